@@ -1,3 +1,28 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from .models import APIKey
+from .services.api_keys import APIKeyService
+
+
+@admin.register(APIKey)
+class APIKeyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'prefix', 'created_at', 'revoked_at')
+    list_filter = ('revoked_at',)
+    search_fields = ('name', 'prefix', 'user__username')
+    readonly_fields = ('prefix', 'created_at', 'revoked_at')
+    actions = ['revoke']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            raw_key = APIKeyService.assign(obj)
+            self.message_user(
+                request,
+                f"API key: {raw_key} - copy it now, it will not be shown again.",
+                messages.WARNING
+            )
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Revoke selected API keys")
+    def revoke(self, request, queryset):
+        revoked = APIKeyService.revoke(queryset)
+        self.message_user(request, f"{revoked} API key(s) revoked.")
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ShortUrlsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'short_urls'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_hook
+
+        connection_created.connect(install_query_hook, dispatch_uid='short_urls_query_hook')
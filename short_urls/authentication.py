@@ -0,0 +1,47 @@
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .services.api_keys import APIKeyService
+
+
+class APIKeyAuthentication(BaseAuthentication):
+    """
+    Authenticates requests that carry "Authorization: Api-Key <key>".
+
+    Requests without that header are left to the next authentication
+    class (Basic auth), so both schemes can be used side by side.
+    """
+    keyword = 'Api-Key'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid API key header.")
+        try:
+            raw_key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed("Invalid API key header.")
+
+        user = APIKeyService.verify(raw_key)
+        if user is None:
+            raise AuthenticationFailed("Invalid or revoked API key.")
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class APIKeyAuthenticationScheme(OpenApiAuthenticationExtension):
+    target_class = 'short_urls.authentication.APIKeyAuthentication'
+    name = 'apiKeyAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {
+            'type': 'apiKey',
+            'in': 'header',
+            'name': 'Authorization',
+            'description': 'Send "Api-Key <key>"',
+        }
@@ -0,0 +1,116 @@
+"""
+Benchmarks run through ``python manage.py benchmark <name>``.
+
+Each module listed in BENCHMARKS provides ``help``, ``add_arguments(parser)``
+and ``run(**options) -> dict``; the returned dict is printed as JSON.
+"""
+import random
+import time
+from contextlib import contextmanager
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import ShortURL, Click, hash_url
+from ..services.click_recorder import ClickEvent
+from ..services.click_rollup import ClickRollupService
+
+BENCHMARKS = {
+    'keygen': 'short_urls.benchmarks.keygen',
+    'fastpath': 'short_urls.benchmarks.fastpath',
+    'stats_queries': 'short_urls.benchmarks.stats_queries',
+    'loadtest': 'short_urls.benchmarks.loadtest',
+    'db': 'short_urls.benchmarks.db',
+    'auth': 'short_urls.benchmarks.auth',
+    'key_filter': 'short_urls.benchmarks.key_filter',
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run a block inside a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+@contextmanager
+def private_caches():
+    """
+    Point every cache alias at a throwaway local-memory cache, so that a
+    benchmark can fill and clear caches without touching a shared backend
+    such as the deployment's Redis.
+    """
+    private = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+        for alias in settings.CACHES
+    }
+    with override_settings(CACHES=private):
+        yield
+
+
+def measure(func, iterations: int) -> dict:
+    """Call func() `iterations` times and report throughput and queries."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+    return {
+        'iterations': iterations,
+        'seconds': round(elapsed, 4),
+        'per_second': round(iterations / elapsed, 1) if elapsed else None,
+        'mean_ms': round(elapsed * 1000 / iterations, 4),
+        'queries': len(queries),
+        'queries_per_iteration': round(len(queries) / iterations, 3),
+    }
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    """Cumulative weights for random.choices where rank r has weight 1 / r^s."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def seed_links(count: int, days: int, chunk_size: int = 5000) -> list[int]:
+    """Insert `count` links keyed bench0..benchN; returns their ids in key order."""
+    expires_at = timezone.now() + timezone.timedelta(days=days)
+    urls = [f'https://example.com/{n}' for n in range(count)]
+    ShortURL.objects.bulk_create(
+        [ShortURL(original_url=url, url_hash=hash_url(url), short_key=f'bench{n}', expires_at=expires_at)
+         for n, url in enumerate(urls)],
+        batch_size=chunk_size
+    )
+    return list(
+        ShortURL.objects.filter(short_key__startswith='bench').order_by('id').values_list('id', flat=True)
+    )
+
+
+def seed_clicks(ids: list[int], count: int, days: int, cum_weights: list[float], chunk_size: int = 50_000) -> None:
+    """
+    Insert `count` time-ordered clicks over the last `days`, picking links
+    by `cum_weights`, together with their hourly rollups and totals.
+    """
+    start = timezone.now() - timezone.timedelta(days=days)
+    step = timezone.timedelta(days=days) / max(count, 1)
+    for offset in range(0, count, chunk_size):
+        size = min(chunk_size, count - offset)
+        picked = random.choices(ids, cum_weights=cum_weights, k=size)
+        events = [ClickEvent(short_url_id, start + step * (offset + n)) for n, short_url_id in enumerate(picked)]
+        Click.objects.bulk_create(
+            [Click(short_url_id=event.short_url_id, clicked_at=event.clicked_at) for event in events],
+            batch_size=chunk_size
+        )
+        ClickRollupService.apply(events)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
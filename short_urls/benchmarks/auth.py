@@ -0,0 +1,56 @@
+from base64 import b64encode
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.request import Request
+
+from ..authentication import APIKeyAuthentication
+from ..services.api_keys import APIKeyService
+from . import measure, rolled_back
+
+help = "Per-request authentication cost: Basic auth (password hasher) vs API key, cold and cached"
+
+USERNAME = 'authbench'
+PASSWORD = 'authbench-password'
+
+
+def add_arguments(parser):
+    parser.add_argument('--iterations', type=int, default=50)
+
+
+def run(iterations, **options):
+    factory = RequestFactory()
+
+    def authenticator(authentication, header):
+        request = Request(factory.get('/api/short-urls/', HTTP_AUTHORIZATION=header))
+
+        def authenticate():
+            user, _ = authentication.authenticate(request)
+            assert user.is_authenticated
+        return authenticate
+
+    with rolled_back():
+        user = get_user_model().objects.create_user(USERNAME, password=PASSWORD)
+        _, raw_key = APIKeyService.issue(user, 'benchmark')
+
+        basic = authenticator(
+            BasicAuthentication(), 'Basic ' + b64encode(f'{USERNAME}:{PASSWORD}'.encode()).decode()
+        )
+        api_key = authenticator(APIKeyAuthentication(), f'Api-Key {raw_key}')
+
+        def api_key_cold():
+            APIKeyService.clear_cache()
+            api_key()
+
+        results = {
+            'basic': measure(basic, iterations),
+            'api_key_cold': measure(api_key_cold, iterations),
+            'api_key_cached': measure(api_key, iterations),
+        }
+        APIKeyService.clear_cache()
+
+    results['speedup_cached_vs_basic'] = round(
+        results['basic']['mean_ms'] / max(results['api_key_cached']['mean_ms'], 1e-6), 1
+    )
+    return results
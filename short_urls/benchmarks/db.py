@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from ..instrumentation import db_pool_stats
+from ..models import ShortURL
+from ..services.click_recorder import click_recorder
+from ..services.redirect_cache import redirect_cache
+from . import measure
+
+help = "Redirect latency with a new database connection per request vs a reused (persistent or pooled) one"
+
+SHORT_KEY = 'dbbench'
+
+
+def add_arguments(parser):
+    parser.add_argument('--iterations', type=int, default=1000)
+
+
+def run(iterations, **options):
+    # Connections are closed between requests, which is not possible inside a
+    # transaction: the benchmark link is committed and deleted afterwards
+    short_url = ShortURL.objects.create(
+        original_url='https://example.com/',
+        short_key=SHORT_KEY,
+        expires_at=timezone.now() + timezone.timedelta(days=1)
+    )
+    client = Client()
+    pooled = db_pool_stats() is not None
+
+    def reconnect():
+        # Same as the end of a request with CONN_MAX_AGE=0; with a pool the
+        # connection goes back to the pool instead of being closed
+        connection.close()
+        client.get(f'/{SHORT_KEY}/')
+
+    def reuse():
+        client.get(f'/{SHORT_KEY}/')
+
+    results = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'conn_health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'pooled': pooled,
+    }
+    # Every redirect must reach the database, and only for the key lookup
+    try:
+        with mock.patch.object(redirect_cache, 'get', return_value=None), \
+                mock.patch.object(click_recorder, 'record'):
+            reuse()
+            results['pool_checkout' if pooled else 'new_connection'] = measure(reconnect, iterations)
+            reuse()
+            results['reused_connection'] = measure(reuse, iterations)
+    finally:
+        short_url.delete()
+
+    if pooled:
+        results['pool_stats'] = db_pool_stats()
+    saved = results['pool_checkout' if pooled else 'new_connection']['mean_ms'] - results['reused_connection']['mean_ms']
+    results['per_request_saving_ms'] = round(saved, 4)
+    return results
@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from ..models import ShortURL
+from ..services.click_recorder import click_recorder
+from . import measure, private_caches, rolled_back
+
+help = "Per-request overhead of the full middleware/DRF stack vs the redirect fast path"
+
+FAST_PATH = 'short_urls.middleware.RedirectFastPathMiddleware'
+
+
+def add_arguments(parser):
+    parser.add_argument('--iterations', type=int, default=5000)
+
+
+def run(iterations, **options):
+    full_stack = [name for name in settings.MIDDLEWARE if name != FAST_PATH]
+    fast_path = list(settings.MIDDLEWARE) if FAST_PATH in settings.MIDDLEWARE else [FAST_PATH] + full_stack
+    results = {}
+    # Click writes and key lookups are identical on both paths: keep them out.
+    # The link's cache entry goes to a private cache that is dropped with it.
+    with private_caches(), rolled_back(), mock.patch.object(click_recorder, 'record'):
+        ShortURL.objects.create(
+            original_url='https://example.com/',
+            short_key='benchmark',
+            expires_at=timezone.now() + timezone.timedelta(days=1)
+        )
+        for name, middleware in (('full_stack', full_stack), ('fast_path', fast_path)):
+            with override_settings(MIDDLEWARE=middleware):
+                client = Client()
+                client.get('/benchmark/')
+                results[name] = measure(lambda: client.get('/benchmark/'), iterations)
+
+    saved = results['full_stack']['mean_ms'] - results['fast_path']['mean_ms']
+    results['overhead_removed_ms'] = round(saved, 4)
+    return results
@@ -0,0 +1,52 @@
+import logging
+import secrets
+import time
+from unittest import mock
+
+from django.test import Client, override_settings
+
+from ..services.click_recorder import click_recorder
+from ..services.redirect_cache import redirect_cache
+from ..services.short_key_filter import short_key_filter
+from . import measure, private_caches, rolled_back, seed_links
+
+help = "Redirects for never-issued keys with and without the Bloom filter of short keys"
+
+
+def add_arguments(parser):
+    parser.add_argument('--links', type=int, default=100_000)
+    parser.add_argument('--iterations', type=int, default=5000)
+
+
+def run(links, iterations, **options):
+    client = Client()
+
+    def unknown_key():
+        # A fresh key every time, as from a scanner: the negative cache never hits
+        client.get(f'/{secrets.token_hex(6)}/')
+
+    results = {}
+    # The filter and cache are cleared and rebuilt below: keep that away from
+    # the shared cache. Every request is a 404: keep django.request from
+    # logging each of them.
+    with private_caches(), rolled_back(), mock.patch.object(click_recorder, 'record'), \
+            mock.patch.object(logging.getLogger('django.request'), 'disabled', True):
+        seed_links(links, days=1)
+        started = time.perf_counter()
+        results['filter'] = short_key_filter.rebuild()
+        results['filter']['build_seconds'] = round(time.perf_counter() - started, 3)
+
+        for name, enabled in (('without_filter', False), ('with_filter', True)):
+            redirect_cache.clear()
+            with override_settings(SHORT_URLS_KEY_FILTER=enabled):
+                unknown_key()
+                results[name] = measure(unknown_key, iterations)
+        results['observed_false_positive_rate'] = round(
+            results['with_filter']['queries'] / iterations, 6
+        )
+        short_key_filter.clear()
+        redirect_cache.clear()
+
+    saved = results['without_filter']['mean_ms'] - results['with_filter']['mean_ms']
+    results['per_miss_saving_ms'] = round(saved, 4)
+    return results
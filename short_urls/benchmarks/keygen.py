@@ -0,0 +1,34 @@
+from django.utils import timezone
+
+from ..models import ShortURL
+from ..services.short_key_generator import KEY_STRATEGIES
+from . import measure, rolled_back
+
+help = "Throughput of short key strategies, alone and with the INSERT they feed"
+
+
+def add_arguments(parser):
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--strategies', nargs='+', default=list(KEY_STRATEGIES))
+
+
+def run(iterations, strategies, **options):
+    results = {}
+    expires_at = timezone.now() + timezone.timedelta(days=1)
+    for name in strategies:
+        strategy = KEY_STRATEGIES[name]
+        with rolled_back():
+            if name == 'pool':
+                strategy.refill(target=iterations * 2)
+            generate = measure(strategy.generate, iterations)
+
+            def create():
+                ShortURL.objects.bulk_create([ShortURL(
+                    original_url='https://example.com/',
+                    short_key=strategy.generate(),
+                    expires_at=expires_at
+                )])
+
+            create_stats = measure(create, iterations)
+        results[name] = {'generate': generate, 'generate_and_insert': create_stats}
+    return results
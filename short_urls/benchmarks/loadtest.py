@@ -0,0 +1,175 @@
+import json
+import random
+import statistics
+import time
+from base64 import b64encode
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import private_caches, rolled_back, seed_clicks, seed_links, zipf_cum_weights
+
+help = "Replay or synthesize mixed redirect/create/list/stats traffic and report latency percentiles per endpoint"
+
+ENDPOINTS = ('redirect', 'create', 'list', 'stats', 'stats_detail')
+DEFAULT_MIX = 'redirect=90,create=4,list=2,stats=2,stats_detail=2'
+USERNAME = 'loadtest'
+PASSWORD = 'loadtest-password'
+
+
+def add_arguments(parser):
+    parser.add_argument('--links', type=int, default=1000)
+    parser.add_argument('--clicks', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--zipf', type=float, default=1.1, help="Key popularity skew exponent")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Endpoint weights, e.g. redirect=90,create=10")
+    parser.add_argument(
+        '--replay',
+        help="JSONL file of requests to replay instead of synthetic traffic; each line "
+             "is {\"method\", \"path\", \"body\"} or {\"endpoint\"} to synthesize one"
+    )
+    parser.add_argument(
+        '--cheap-auth', action='store_true',
+        help="Use a fast password hasher so Basic auth does not hide endpoint cost"
+    )
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible traffic")
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in --mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class Traffic:
+    """Builds requests for each endpoint, picking keys by Zipf popularity."""
+
+    def __init__(self, links: int, exponent: float):
+        self.keys = [f'bench{n}' for n in range(links)]
+        self.cum_weights = zipf_cum_weights(links, exponent)
+        self.created = 0
+
+    def popular_key(self) -> str:
+        return random.choices(self.keys, cum_weights=self.cum_weights)[0]
+
+    def redirect(self):
+        return 'GET', f'/{self.popular_key()}/', None
+
+    def create(self):
+        self.created += 1
+        return 'POST', '/api/short-urls/', {'original_url': f'https://example.com/new/{self.created}'}
+
+    def list(self):
+        return 'GET', '/api/short-urls/?page_size=20', None
+
+    def stats(self):
+        return 'GET', '/api/short-urls/stats/?page_size=20', None
+
+    def stats_detail(self):
+        return 'GET', f'/api/short-urls/stats/{self.popular_key()}/', None
+
+
+def synthesize(traffic: Traffic, mix: dict[str, float], count: int):
+    names = random.choices(list(mix), weights=list(mix.values()), k=count)
+    for name in names:
+        yield (name, *getattr(traffic, name)())
+
+
+def replay_file(traffic: Traffic, path: str):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if 'path' in entry:
+                yield entry.get('endpoint', 'replay'), entry.get('method', 'GET'), entry['path'], entry.get('body')
+            elif entry.get('endpoint') in ENDPOINTS:
+                yield (entry['endpoint'], *getattr(traffic, entry['endpoint'])())
+
+
+def send(client: Client, method: str, path: str, body, auth: str):
+    headers = {'HTTP_AUTHORIZATION': auth} if path.startswith('/api/') else {}
+    if method == 'GET':
+        return client.get(path, **headers)
+    return client.generic(method, path, json.dumps(body or {}), content_type='application/json', **headers)
+
+
+def percentile(quantiles: list[float], pct: int) -> float:
+    return round(quantiles[pct - 1], 3)
+
+
+def summarize(samples: list[tuple[float, int, int]], elapsed: float) -> dict:
+    latencies = [latency for latency, _, _ in samples]
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(samples),
+        'per_second': round(len(samples) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': percentile(quantiles, 50),
+        'p95_ms': percentile(quantiles, 95),
+        'p99_ms': percentile(quantiles, 99),
+        'max_ms': round(max(latencies), 3),
+        'queries_per_request': round(sum(queries for _, queries, _ in samples) / len(samples), 3),
+        'status_codes': dict(Counter(status for _, _, status in samples)),
+    }
+
+
+def run(links, clicks, days, zipf, requests, warmup, mix, replay, cheap_auth, seed, **options):
+    if seed is not None:
+        random.seed(seed)
+    traffic = Traffic(links, zipf)
+    auth = 'Basic ' + b64encode(f'{USERNAME}:{PASSWORD}'.encode()).decode()
+
+    # Clicks are written inline so that they stay inside the rolled back
+    # transaction and their cost is part of the redirect latency
+    overrides = {'SHORT_URLS_CLICK_RECORDER_MODE': 'sync'}
+    if cheap_auth:
+        overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    # Cache entries for the rolled back links, leaderboard pages and the like
+    # go to a private cache, which also makes every run start cold
+    with private_caches(), rolled_back(), override_settings(**overrides):
+        started = time.perf_counter()
+        ids = seed_links(links, days)
+        seed_clicks(ids, clicks, days, zipf_cum_weights(links, zipf))
+        get_user_model().objects.create_user(USERNAME, password=PASSWORD)
+        seeded = round(time.perf_counter() - started, 2)
+
+        if replay:
+            plan = list(replay_file(traffic, replay))
+        else:
+            plan = list(synthesize(traffic, parse_mix(mix), warmup + requests))
+        client = Client()
+        for _, method, path, body in plan[:warmup]:
+            send(client, method, path, body, auth)
+
+        samples = {}
+        started = time.perf_counter()
+        for endpoint, method, path, body in plan[warmup:]:
+            with CaptureQueriesContext(connection) as queries:
+                request_started = time.perf_counter()
+                response = send(client, method, path, body, auth)
+                latency = (time.perf_counter() - request_started) * 1000
+            samples.setdefault(endpoint, []).append((latency, len(queries), response.status_code))
+        elapsed = time.perf_counter() - started
+
+    every = [sample for endpoint_samples in samples.values() for sample in endpoint_samples]
+    return {
+        'seed': {'links': links, 'clicks': clicks, 'days': days, 'zipf': zipf, 'seconds': seeded},
+        'source': replay or mix,
+        'endpoints': {
+            endpoint: summarize(endpoint_samples, sum(latency for latency, _, _ in endpoint_samples) / 1000)
+            for endpoint, endpoint_samples in sorted(samples.items())
+        },
+        'total': summarize(every, elapsed) if every else None,
+    }
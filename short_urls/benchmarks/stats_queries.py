@@ -0,0 +1,80 @@
+import time
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..models import ShortURL
+from ..services.agregate_stats import ShortURLStatsService
+from . import measure, rolled_back, seed_clicks, seed_links, zipf_cum_weights
+
+help = "Query plans and timings of per-link stats before and after the (short_url_id, clicked_at) index"
+
+# The click indexing scheme before the composite index, and the statements
+# that swap it back in for the "before" run (rolled back afterwards)
+LEGACY_INDEXES = [
+    "DROP INDEX short_urls_click_url_time_idx",
+    "CREATE INDEX bench_click_url_idx ON short_urls_click (short_url_id)",
+    "CREATE INDEX bench_click_time_idx ON short_urls_click (clicked_at DESC)",
+]
+
+
+def add_arguments(parser):
+    parser.add_argument('--links', type=int, default=1000)
+    parser.add_argument('--clicks', type=int, default=2_000_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    parser.add_argument('--iterations', type=int, default=50)
+
+
+def legacy_detail_queryset(short_key: str):
+    """detail_stats as it was written before rollups and the composite index."""
+    now = timezone.now()
+    return ShortURL.objects.filter(short_key=short_key).annotate(
+        last_hour_clicks=Count('clicks', filter=Q(clicks__clicked_at__gt=now - timezone.timedelta(hours=1))),
+        last_day_clicks=Count('clicks', filter=Q(clicks__clicked_at__gt=now - timezone.timedelta(days=1))),
+        all_time_clicks=Count('clicks'),
+    )
+
+
+def seed(links: int, clicks: int, days: int, chunk_size: int) -> str:
+    """Seed a Zipf-skewed, time-ordered click set. Returns the hottest key."""
+    ids = seed_links(links, days)
+    seed_clicks(ids, clicks, days, zipf_cum_weights(links, 1.2), chunk_size)
+    return 'bench0'
+
+
+def explain(queryset) -> list[str]:
+    options = {'analyze': True, 'buffers': True} if connection.vendor == 'postgresql' else {}
+    return queryset.explain(**options).splitlines()
+
+
+def profile(build, short_key: str, iterations: int) -> dict:
+    return {
+        'plan': explain(build(short_key)),
+        **measure(lambda: list(build(short_key)), iterations),
+    }
+
+
+def run(links, clicks, days, chunk_size, iterations, **options):
+    with rolled_back():
+        started = time.perf_counter()
+        short_key = seed(links, clicks, days, chunk_size)
+        seeded = {'links': links, 'clicks': clicks, 'days': days, 'seconds': round(time.perf_counter() - started, 2)}
+
+        with rolled_back(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("DROP INDEX IF EXISTS short_urls_click_time_brin")
+            for statement in LEGACY_INDEXES:
+                cursor.execute(statement)
+            cursor.execute("ANALYZE")
+            before = profile(legacy_detail_queryset, short_key, iterations)
+
+        after = profile(ShortURLStatsService.detail_queryset, short_key, iterations)
+
+    return {
+        'seed': seeded,
+        'before': before,
+        'after': after,
+        'speedup': round(before['mean_ms'] / after['mean_ms'], 1) if after['mean_ms'] else None,
+    }
@@ -11,5 +11,91 @@ SHORT_KEY_LENGTH = 12
 TOKEN_BYTES = 8
 
 MAX_SHORT_KEY_GENERATION_ATTEMPTS = 10
+SHORT_KEY_SEQUENCE_BLOCK_SIZE = 1000
+SHORT_KEY_PERMUTATION_ROUNDS = 4
+
+KEY_POOL_CLAIM_BATCH_SIZE = 100
+KEY_POOL_TARGET_SIZE = 100_000
+KEY_POOL_LOW_WATERMARK = 20_000
+KEY_POOL_REFILL_CHUNK_SIZE = 5000
 SHORT_KEY_ALPHABET = "1234567890qwertyuiopasdfghjklzxcvbnmQWERTYUIOPASDFGHJKLZXCVBNM"
 SHORT_KEY_REGEX = r"^[" + re.escape(SHORT_KEY_ALPHABET) + "]+$"
+
+REDIRECT_CACHE_MAX_SIZE = 10000
+REDIRECT_CACHE_TTL_SECONDS = 60
+REDIRECT_CACHE_NEGATIVE_TTL_SECONDS = 5
+REDIRECT_CACHE_GENERATION_CHECK_SECONDS = 1
+# Invalidated keys are logged per generation so that other processes drop just
+# those; a process further behind, or missing an entry, clears its whole cache
+REDIRECT_CACHE_INVALIDATION_LOG_SIZE = 100
+REDIRECT_CACHE_INVALIDATION_LOG_SECONDS = 300
+
+# Per-link redirect status codes: permanent (301, 308) or temporary (302, 307);
+# 307 and 308 keep the request method
+REDIRECT_STATUSES = (301, 302, 307, 308)
+REDIRECT_STATUS_CHOICES = [(code, str(code)) for code in REDIRECT_STATUSES]
+DEFAULT_REDIRECT_STATUS = 302
+
+SHORT_URLS_CACHE_ALIAS = 'short_urls'
+
+CLICK_RECORDER_BATCH_SIZE = 500
+CLICK_RECORDER_FLUSH_INTERVAL_SECONDS = 1.0
+CLICK_RECORDER_MAX_QUEUE_SIZE = 100_000
+CLICK_RECORDER_ENQUEUE_TIMEOUT_SECONDS = 0.01
+CLICK_RECORDER_OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+STATS_EXPORT_CHUNK_SIZE = 2000
+STATS_EXPORT_FORMATS = ('ndjson', 'csv')
+# Windowed counters move as clicks age out: a stats detail ETag lasts at most this long
+STATS_DETAIL_ETAG_SECONDS = 60
+
+BULK_CREATE_MAX_ITEMS = 10000
+BULK_CREATE_CHUNK_SIZE = 1000
+# Keys per batch stats / batch resolve request
+BATCH_LOOKUP_MAX_KEYS = 500
+
+# First path segments that belong to the site itself, never to a short key
+RESERVED_PATH_SEGMENTS = frozenset({'admin', 'api', 'metrics', 'static'})
+REDIRECT_PATH_REGEX = r'^/(?P<short_key>[a-zA-Z0-9]+)/$'
+
+CLICK_PARTITION_MONTHS_AHEAD = 3
+# Stats count raw clicks in the leading partial hour of the last-day window
+CLICK_RETENTION_MIN_DAYS = 2
+CLICK_PRUNE_BATCH_SIZE = 10_000
+
+EXPIRY_SWEEP_BATCH_SIZE = 1000
+
+METRICS_LATENCY_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Stats leaderboard: top links precomputed by refresh_stats_leaderboard
+LEADERBOARD_SIZE = 1000
+LEADERBOARD_CACHE_TTL_SECONDS = 5
+# An older leaderboard is ignored and /stats/ is computed live again
+LEADERBOARD_MAX_AGE_SECONDS = 300
+
+# API keys: only an HMAC digest is stored; verified keys are cached per
+# process, so a revocation reaches other processes within the TTL
+API_KEY_BYTES = 32
+API_KEY_PREFIX_LENGTH = 8
+API_KEY_CACHE_MAX_SIZE = 10000
+API_KEY_CACHE_TTL_SECONDS = 30
+
+# Bloom filter of issued short keys (SHORT_URLS_KEY_FILTER)
+SHORT_KEY_FILTER_FALSE_POSITIVE_RATE = 0.01
+SHORT_KEY_FILTER_MIN_CAPACITY = 100_000
+# Capacity relative to the number of keys at build time
+SHORT_KEY_FILTER_HEADROOM = 2
+SHORT_KEY_FILTER_BUILD_CHUNK_SIZE = 10_000
+SHORT_KEY_FILTER_SYNC_SECONDS = 10
+SHORT_KEY_FILTER_MAX_AGE_SECONDS = 600
+# Keys are committed some time after their created_at: each sync re-reads this far back
+SHORT_KEY_FILTER_MERGE_OVERLAP_SECONDS = 60
+# Must outlive a sync, so that every process has merged the key by then
+SHORT_KEY_FILTER_WRITE_THROUGH_SECONDS = SHORT_KEY_FILTER_SYNC_SECONDS * 6
+
+# Create deduplication: an existing live link is reused only if it lives at
+# least as long as the requested one, less this slack
+CREATE_REUSE_EXPIRY_SLACK_SECONDS = 3600
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Idempotency keys are honoured for this long, then pruned by the sweeper
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 3600
@@ -0,0 +1,210 @@
+"""
+Lightweight request instrumentation.
+
+Every request gets a RequestTimings in a context variable: a query hook
+installed on each database connection adds query count and DB time to it,
+and span()/timed() add the duration of hot-path service calls. The
+middleware turns the result into a Server-Timing header and folds it into
+process-wide Prometheus counters served at /metrics.
+
+Outside a request (management commands, the click recorder thread) only the
+process-wide span counters are updated.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .constants import METRICS_LATENCY_BUCKETS_SECONDS
+
+
+class RequestTimings:
+    __slots__ = ('started', 'view', 'queries', 'db_seconds', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"']
+        parts.extend(f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.spans.items())
+        parts.append(f'total;dur={total_seconds * 1000:.2f}')
+        return ', '.join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar('short_urls_request_timings', default=None)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def set_view(name: str) -> None:
+    """Label the current request for metrics when no URL pattern matched it."""
+    timings = _current.get()
+    if timings is not None:
+        timings.view = name
+
+
+class Metrics:
+    """Process-wide counters rendered in the Prometheus text format."""
+
+    def __init__(self, buckets: tuple = METRICS_LATENCY_BUCKETS_SECONDS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.request_buckets = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+            self.request_seconds = defaultdict(float)
+            self.request_count = defaultdict(int)
+            self.db_queries = defaultdict(int)
+            self.db_seconds = defaultdict(float)
+            self.span_seconds = defaultdict(float)
+            self.span_count = defaultdict(int)
+
+    def observe_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.span_seconds[name] += seconds
+            self.span_count[name] += 1
+
+    def observe_request(self, timings: RequestTimings, method: str, status: int, seconds: float) -> None:
+        view = timings.view or 'unresolved'
+        with self._lock:
+            self.requests[(view, method, status)] += 1
+            self.request_buckets[view][bisect_left(self.buckets, seconds)] += 1
+            self.request_seconds[view] += seconds
+            self.request_count[view] += 1
+            self.db_queries[view] += timings.queries
+            self.db_seconds[view] += timings.db_seconds
+
+    def render(self, gauges: dict[str, dict] = None) -> str:
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            family('short_urls_http_requests_total', 'counter', 'Requests by view, method and status')
+            for (view, method, status), value in sorted(self.requests.items()):
+                lines.append(f'short_urls_http_requests_total{{view="{view}",method="{method}",status="{status}"}} {value}')
+
+            family('short_urls_http_request_duration_seconds', 'histogram', 'Request latency by view')
+            for view, counts in sorted(self.request_buckets.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, '+Inf'), counts):
+                    cumulative += count
+                    lines.append(f'short_urls_http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'short_urls_http_request_duration_seconds_sum{{view="{view}"}} {self.request_seconds[view]:.6f}')
+                lines.append(f'short_urls_http_request_duration_seconds_count{{view="{view}"}} {self.request_count[view]}')
+
+            family('short_urls_db_queries_total', 'counter', 'SQL queries executed by view')
+            for view, value in sorted(self.db_queries.items()):
+                lines.append(f'short_urls_db_queries_total{{view="{view}"}} {value}')
+            family('short_urls_db_query_seconds_total', 'counter', 'Time spent in SQL queries by view')
+            for view, value in sorted(self.db_seconds.items()):
+                lines.append(f'short_urls_db_query_seconds_total{{view="{view}"}} {value:.6f}')
+
+            family('short_urls_span_duration_seconds', 'summary', 'Time spent in instrumented service calls')
+            for name, value in sorted(self.span_seconds.items()):
+                lines.append(f'short_urls_span_duration_seconds_sum{{span="{name}"}} {value:.6f}')
+                lines.append(f'short_urls_span_duration_seconds_count{{span="{name}"}} {self.span_count[name]}')
+
+        for prefix, values in (gauges or {}).items():
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    family(f'short_urls_{prefix}_{key}', 'gauge', f'{prefix} {key}')
+                    lines.append(f'short_urls_{prefix}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block and attribute it to the current request and to /metrics."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = _current.get()
+        if timings is not None:
+            timings.add_span(name, elapsed)
+        metrics.observe_span(name, elapsed)
+
+
+def timed(name: str):
+    """Decorator form of span() for sync and async functions."""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def db_pool_stats(alias: str = DEFAULT_DB_ALIAS) -> Optional[dict]:
+    """
+    psycopg 3 pool counters (pool_size, pool_available, requests_waiting, ...)
+    or None when the connection is not pooled.
+    """
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+    return pool.get_stats()
+
+
+def query_hook(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_seconds += time.perf_counter() - started
+
+
+def install_query_hook(sender, connection, **kwargs):
+    """connection_created receiver: count queries on every new connection."""
+    if query_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_hook)
+
+
+@contextmanager
+def request_timings():
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
@@ -0,0 +1,28 @@
+import json
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ...benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run a benchmark against the configured database and print the results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Also write the JSON results to this file")
+        subparsers = parser.add_subparsers(dest='benchmark', required=True)
+        for name, module_path in BENCHMARKS.items():
+            module = import_module(module_path)
+            subparser = subparsers.add_parser(name, help=module.help)
+            module.add_arguments(subparser)
+
+    def handle(self, *args, benchmark, output=None, **options):
+        module = import_module(BENCHMARKS[benchmark])
+        results = {'benchmark': benchmark, 'results': module.run(**options)}
+        payload = json.dumps(results, indent=2, cls=DjangoJSONEncoder)
+        if output:
+            with open(output, 'w') as f:
+                f.write(payload)
+        self.stdout.write(payload)
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.api_keys import APIKeyService
+
+
+class Command(BaseCommand):
+    help = "Issue an API key for a user and print it (it is stored hashed and cannot be shown again)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='api', help="What the key is used for")
+
+    def handle(self, *args, username, name, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: username})
+        except User.DoesNotExist:
+            raise CommandError(f"User {username!r} does not exist")
+        api_key, raw_key = APIKeyService.issue(user, name)
+        self.stderr.write(f"Issued API key {api_key.prefix}… for {username}")
+        self.stdout.write(raw_key)
@@ -0,0 +1,29 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ...constants import CLICK_PARTITION_MONTHS_AHEAD, CLICK_RETENTION_MIN_DAYS
+from ...services.click_partitions import ClickPartitionService
+
+
+class Command(BaseCommand):
+    help = "Create upcoming Click partitions and drop or delete clicks past the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=CLICK_PARTITION_MONTHS_AHEAD)
+        parser.add_argument('--retention-days', type=int, default=None)
+        parser.add_argument('--no-prune', action='store_true', help="Only create partitions")
+
+    def handle(self, *args, months_ahead, retention_days, no_prune, **options):
+        retention_days = retention_days or settings.SHORT_URLS_CLICK_RETENTION_DAYS
+        if retention_days < CLICK_RETENTION_MIN_DAYS:
+            raise CommandError(f"Retention must be at least {CLICK_RETENTION_MIN_DAYS} days")
+
+        result = {'created_partitions': []}
+        if ClickPartitionService.partitioned():
+            result['created_partitions'] = ClickPartitionService.ensure_partitions(months_ahead)
+        if not no_prune:
+            result.update(ClickPartitionService.prune(retention_days))
+        self.stdout.write(json.dumps(result, cls=DjangoJSONEncoder))
@@ -0,0 +1,28 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...constants import SHORT_KEY_FILTER_BUILD_CHUNK_SIZE
+from ...services.short_key_filter import short_key_filter
+
+
+class Command(BaseCommand):
+    help = "Rebuild the shared Bloom filter of short keys (once, or continuously with --interval)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=SHORT_KEY_FILTER_BUILD_CHUNK_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Keep running and rebuild every N seconds"
+        )
+
+    def handle(self, *args, chunk_size, interval, **options):
+        while True:
+            started = time.perf_counter()
+            stats = short_key_filter.rebuild(chunk_size=chunk_size)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Key filter rebuilt in {elapsed:.2f}s: {json.dumps(stats)}")
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,38 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...constants import KEY_POOL_TARGET_SIZE, KEY_POOL_LOW_WATERMARK
+from ...services.short_key_generator import KEY_STRATEGIES
+
+
+class Command(BaseCommand):
+    help = "Top up the pre-generated short key pool (once, or continuously with --interval)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', type=int, default=KEY_POOL_TARGET_SIZE)
+        parser.add_argument('--low-watermark', type=int, default=KEY_POOL_LOW_WATERMARK)
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Keep running and check the pool every N seconds"
+        )
+        parser.add_argument('--source', choices=['checked', 'random', 'sequence'], default=None)
+        parser.add_argument('--stats', action='store_true', help="Only print pool statistics")
+
+    def handle(self, *args, target, low_watermark, interval, source, stats, **options):
+        pool = KEY_STRATEGIES['pool']
+        pool.low_watermark = low_watermark
+        if stats:
+            self.stdout.write(json.dumps(pool.stats()))
+            return
+
+        while True:
+            available = pool.available()
+            # In loop mode only refill once the pool drops below the watermark
+            if interval is None or available < low_watermark:
+                added = pool.refill(target=target, source=source)
+                self.stdout.write(f"Key pool: {available} available, {added} added")
+            if interval is None:
+                return
+            time.sleep(interval)
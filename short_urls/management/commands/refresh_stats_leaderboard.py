@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...constants import LEADERBOARD_SIZE
+from ...services.stats_leaderboard import StatsLeaderboardService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed stats leaderboard (once, or continuously with --interval)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=LEADERBOARD_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Keep running and refresh every N seconds"
+        )
+
+    def handle(self, *args, top, interval, **options):
+        while True:
+            started = time.perf_counter()
+            rows = StatsLeaderboardService.refresh(top=top)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Leaderboard: {rows} rows refreshed in {elapsed:.2f}s")
+            if interval is None:
+                return
+            time.sleep(interval)
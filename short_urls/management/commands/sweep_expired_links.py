@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...constants import EXPIRY_SWEEP_BATCH_SIZE
+from ...services.idempotent_create import IdempotentCreateService
+from ...services.sweep_expired_links import SweepExpiredLinksService
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate expired short links in batches and prune old idempotency keys "
+        "(once, or continuously with --interval)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=EXPIRY_SWEEP_BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Keep running and sweep every N seconds"
+        )
+
+    def handle(self, *args, batch_size, interval, **options):
+        while True:
+            deactivated = SweepExpiredLinksService.execute(batch_size=batch_size)
+            pruned = IdempotentCreateService.prune()
+            self.stdout.write(f"Expired links: {deactivated} deactivated, {pruned} idempotency keys pruned")
+            if interval is None:
+                return
+            time.sleep(interval)
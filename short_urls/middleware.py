@@ -0,0 +1,146 @@
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .constants import REDIRECT_PATH_REGEX, RESERVED_PATH_SEGMENTS
+from .instrumentation import metrics, request_timings, set_view
+from .routers import STICKY_COOKIE, remember_user_write, routing_state
+from .views import aredirect_response, redirect_response
+
+
+class InstrumentationMiddleware:
+    """
+    Measures each request: total time, SQL query count and DB time, and the
+    instrumented service spans. Adds a Server-Timing header and feeds the
+    /metrics counters. Place it before RedirectFastPathMiddleware so that
+    fast-path redirects are measured too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _finish(self, request, response, timings):
+        elapsed = time.perf_counter() - timings.started
+        match = request.resolver_match
+        if timings.view is None and match is not None:
+            timings.view = match.view_name
+        metrics.observe_request(timings, request.method, response.status_code, elapsed)
+        if settings.SHORT_URLS_SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(elapsed)
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with request_timings() as timings:
+            response = self.get_response(request)
+            return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        with request_timings() as timings:
+            response = await self.get_response(request)
+            return self._finish(request, response, timings)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes for primary/replica routing. A request that wrote to
+    the primary marks its client (cookie, and the user for authenticated
+    API clients) so that the client's reads stay on the primary for
+    SHORT_URLS_REPLICA_STICKY_SECONDS, longer than the expected replica lag.
+    Does nothing unless SHORT_URLS_DB_REPLICAS is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _sticky(request) -> bool:
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _remember(request, response) -> None:
+        ttl = settings.SHORT_URLS_REPLICA_STICKY_SECONDS
+        response.set_cookie(
+            STICKY_COOKIE, str(time.time() + ttl), max_age=ttl, httponly=True, samesite='Lax'
+        )
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            remember_user_write(user.pk)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.SHORT_URLS_DB_REPLICAS:
+            return self.get_response(request)
+        with routing_state(pinned=self._sticky(request)) as state:
+            response = self.get_response(request)
+            if state.wrote:
+                self._remember(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.SHORT_URLS_DB_REPLICAS:
+            return await self.get_response(request)
+        with routing_state(pinned=self._sticky(request)) as state:
+            response = await self.get_response(request)
+            if state.wrote:
+                self._remember(request, response)
+        return response
+
+
+class RedirectFastPathMiddleware:
+    """
+    Answers redirect-shaped requests (GET/HEAD /<short_key>/) directly with
+    302/404/410, before URL resolution, the remaining middleware and DRF
+    dispatch. Every other request passes through untouched.
+    """
+    sync_capable = True
+    async_capable = True
+
+    path_regex = re.compile(REDIRECT_PATH_REGEX)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _short_key(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        match = self.path_regex.match(request.path_info)
+        if match is None or match['short_key'] in RESERVED_PATH_SEGMENTS:
+            return None
+        return match['short_key']
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        short_key = self._short_key(request)
+        if short_key is None:
+            return self.get_response(request)
+        set_view('redirect')
+        return redirect_response(short_key)
+
+    async def __acall__(self, request):
+        short_key = self._short_key(request)
+        if short_key is None:
+            return await self.get_response(request)
+        set_view('redirect')
+        return await aredirect_response(short_key)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 17:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='click',
+            name='clicked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Timestamp when the click occurred'),
+        ),
+    ]
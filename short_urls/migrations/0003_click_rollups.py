@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-18 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    ShortURL = apps.get_model('short_urls', 'ShortURL')
+    Click = apps.get_model('short_urls', 'Click')
+    ClickBucket = apps.get_model('short_urls', 'ClickBucket')
+
+    buckets = (
+        Click.objects.order_by()
+        .annotate(hour=TruncHour('clicked_at'))
+        .values('short_url_id', 'hour')
+        .annotate(count=Count('id'))
+    )
+    ClickBucket.objects.bulk_create(
+        (ClickBucket(short_url_id=row['short_url_id'], hour=row['hour'], count=row['count'])
+         for row in buckets.iterator()),
+        batch_size=1000,
+    )
+
+    totals = Click.objects.order_by().values('short_url_id').annotate(count=Count('id'))
+    for row in totals.iterator():
+        ShortURL.objects.filter(pk=row['short_url_id']).update(total_clicks=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0002_click_clicked_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shorturl',
+            name='total_clicks',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Running all-time click counter maintained by click ingestion'),
+        ),
+        migrations.CreateModel(
+            name='ClickBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour the clicks belong to')),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of clicks within the hour')),
+                ('short_url', models.ForeignKey(help_text='Associated shortened URL', on_delete=django.db.models.deletion.CASCADE, related_name='click_buckets', to='short_urls.shorturl')),
+            ],
+            options={
+                'verbose_name': 'URL Click Bucket',
+                'verbose_name_plural': 'URL Click Buckets',
+                'ordering': ['-hour'],
+                'constraints': [models.UniqueConstraint(fields=('short_url', 'hour'), name='unique_click_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
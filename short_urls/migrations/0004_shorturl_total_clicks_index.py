@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0003_click_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shorturl',
+            index=models.Index(fields=['-total_clicks', '-id'], name='short_urls_total_clicks_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0004_shorturl_total_clicks_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shorturl',
+            index=models.Index(fields=['-created_at', '-id'], name='short_urls_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0005_shorturl_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeySequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Sequence name', max_length=50, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=0, help_text='First value of the next unallocated block')),
+            ],
+        ),
+    ]
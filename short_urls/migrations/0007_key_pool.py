@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0006_key_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PooledShortKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('short_key', models.CharField(help_text='Reserved short key', max_length=15, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the key was added to the pool')),
+            ],
+        ),
+    ]
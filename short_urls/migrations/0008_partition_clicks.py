@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+from short_urls.constants import CLICK_PARTITION_MONTHS_AHEAD
+
+TABLE = 'short_urls_click'
+LEGACY = 'short_urls_click_legacy'
+
+
+def month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(moment):
+    return month_start(month_start(moment) + timedelta(days=32))
+
+
+def partition_clicks(apps, schema_editor):
+    """
+    Rebuild the click table as a table range-partitioned by month on
+    clicked_at. PostgreSQL only: other backends keep the plain table and
+    rely on batched deletes for retention.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey']
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+        cursor.execute(f'ALTER TABLE "{LEGACY}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{LEGACY}_pkey"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" ('
+            f'id bigint GENERATED BY DEFAULT AS IDENTITY, '
+            f'short_url_id bigint NOT NULL REFERENCES short_urls_shorturl (id) DEFERRABLE INITIALLY DEFERRED, '
+            f'clicked_at timestamp with time zone NOT NULL, '
+            f'PRIMARY KEY (id, clicked_at)'
+            f') PARTITION BY RANGE (clicked_at)'
+        )
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'SELECT MIN(clicked_at) FROM "{LEGACY}"')
+        oldest = cursor.fetchone()[0]
+        now = timezone.now()
+        month = month_start(min(oldest, now) if oldest else now)
+        last = month_start(now)
+        for _ in range(CLICK_PARTITION_MONTHS_AHEAD):
+            last = next_month(last)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [month, next_month(month)]
+            )
+            month = next_month(month)
+
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" (id, short_url_id, clicked_at) '
+            f'SELECT id, short_url_id, clicked_at FROM "{LEGACY}"'
+        )
+        cursor.execute(f'DROP TABLE "{LEGACY}"')
+        for indexdef in indexes:
+            cursor.execute(indexdef)
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f'FROM "{TABLE}"',
+            [TABLE]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0007_key_pool'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_clicks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0009_click_url_time_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shorturl',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='short_urls_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shorturl',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='short_urls_live_expiry_idx'),
+        ),
+    ]
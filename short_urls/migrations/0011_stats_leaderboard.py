@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0010_live_link_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField(help_text='Position in the leaderboard, starting at 1', unique=True)),
+                ('short_key', models.CharField(help_text='Short key at refresh time', max_length=15)),
+                ('original_url', models.URLField(help_text='Original URL at refresh time', max_length=2048)),
+                ('last_hour_clicks', models.PositiveIntegerField(default=0)),
+                ('last_day_clicks', models.PositiveIntegerField(default=0)),
+                ('all_time_clicks', models.PositiveBigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(help_text='Timestamp of the refresh that produced this row')),
+                ('short_url', models.ForeignKey(help_text='Associated shortened URL', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='short_urls.shorturl')),
+            ],
+            options={
+                'verbose_name': 'Stats Leaderboard Entry',
+                'verbose_name_plural': 'Stats Leaderboard Entries',
+                'ordering': ['rank'],
+            },
+        ),
+    ]
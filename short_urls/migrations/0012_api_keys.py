@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0011_stats_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='What the key is used for', max_length=100)),
+                ('prefix', models.CharField(editable=False, help_text='First characters of the key, to tell keys apart', max_length=8)),
+                ('digest', models.CharField(editable=False, help_text='HMAC-SHA256 of the key', max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the key was issued')),
+                ('revoked_at', models.DateTimeField(blank=True, editable=False, help_text='Timestamp when the key was revoked', null=True)),
+                ('user', models.ForeignKey(help_text='User the key authenticates as', on_delete=django.db.models.deletion.CASCADE, related_name='api_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'API Key',
+                'verbose_name_plural': 'API Keys',
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-18 18:13
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_url_hash(apps, schema_editor):
+    """
+    Hash the original URL of existing links. PostgreSQL does it in one
+    statement; other backends in batches.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE short_urls_shorturl SET url_hash = encode(sha256(convert_to(original_url, 'UTF8')), 'hex')"
+        )
+        return
+
+    ShortURL = apps.get_model('short_urls', 'ShortURL')
+    last_id = 0
+    while True:
+        batch = list(
+            ShortURL.objects.filter(id__gt=last_id).order_by('id').only('id', 'original_url')[:BACKFILL_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for short_url in batch:
+            short_url.url_hash = hashlib.sha256(short_url.original_url.encode()).hexdigest()
+        ShortURL.objects.bulk_update(batch, ['url_hash'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0012_api_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Client-chosen Idempotency-Key header value', max_length=255)),
+                ('request_hash', models.CharField(help_text='SHA-256 of the request parameters, to detect a reused key', max_length=64)),
+                ('created', models.BooleanField(help_text='Whether the first request created the link or reused one')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='Timestamp of the first request')),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+            },
+        ),
+        migrations.AddField(
+            model_name='shorturl',
+            name='url_hash',
+            field=models.CharField(default='', editable=False, help_text='SHA-256 of original_url, set on save', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_url_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='shorturl',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['url_hash'], name='short_urls_live_url_hash_idx'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='short_url',
+            field=models.ForeignKey(help_text='Link returned to the first request', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='short_urls.shorturl'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(help_text='User that sent the request; keys are scoped per user', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='unique_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('short_urls', '0013_url_hash_and_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shorturl',
+            name='redirect_status',
+            field=models.PositiveSmallIntegerField(choices=[(301, '301'), (302, '302'), (307, '307'), (308, '308')], default=302, help_text='HTTP status of the redirect'),
+        ),
+        migrations.AddField(
+            model_name='shorturl',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Timestamp of the last change, the validator for conditional GETs'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import hashlib
+
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -5,6 +8,24 @@ from django.core.validators import URLValidator
 from . import constants
 
 
+def hash_url(url: str) -> str:
+    """Fixed-width digest of an original URL, for indexed equality lookups."""
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+class ShortURLQuerySet(models.QuerySet):
+    def active(self):
+        """Links that still redirect: not deactivated and not expired."""
+        return self.filter(is_active=True, expires_at__gt=timezone.now())
+
+    def expired(self):
+        """Links past their expiration date, whether swept or not."""
+        return self.filter(expires_at__lte=timezone.now())
+
+    def pending_expiry(self):
+        """Expired links the sweeper has not deactivated yet."""
+        return self.filter(is_active=True, expires_at__lte=timezone.now())
+
 
 class ShortURL(models.Model):
     """Model representing a shortened URL."""
@@ -30,12 +51,56 @@ class ShortURL(models.Model):
         default=True,
         help_text="Flag indicating if the URL is active"
     )
-    
+    total_clicks = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Running all-time click counter maintained by click ingestion"
+    )
+    redirect_status = models.PositiveSmallIntegerField(
+        choices=constants.REDIRECT_STATUS_CHOICES,
+        default=constants.DEFAULT_REDIRECT_STATUS,
+        help_text="HTTP status of the redirect"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp of the last change, the validator for conditional GETs"
+    )
+    url_hash = models.CharField(
+        max_length=64,
+        editable=False,
+        help_text="SHA-256 of original_url, set on save"
+    )
+
+    objects = ShortURLQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='short_urls_created_idx'),
+            models.Index(fields=['-total_clicks', '-id'], name='short_urls_total_clicks_idx'),
+            # Partial indexes over live rows: expired links are deactivated by
+            # the sweeper, so is_active alone keeps them small
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='short_urls_live_created_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['expires_at'],
+                name='short_urls_live_expiry_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['url_hash'],
+                name='short_urls_live_url_hash_idx',
+                condition=models.Q(is_active=True)
+            ),
+        ]
+
 
     @property
     def click_count(self):
         """Return the number of clicks for this short URL."""
-        return self.clicks.count()
+        return self.total_clicks
     
     def is_expired(self):
         """Check if the short URL has expired."""
@@ -48,9 +113,16 @@ class ShortURL(models.Model):
         if self.expires_at <= timezone.now():
             raise ValidationError("Expiration date must be in the future")
         
-    def save(self, *args, **kwargs):
-        """Save model with full validation."""
-        self.full_clean()
+    def save(self, *args, validate: bool = True, **kwargs):
+        """
+        Save model with full validation. Pass validate=False when the values
+        were already validated (e.g. by a serializer): full_clean() repeats
+        every field validator and runs a query per unique field.
+        bulk_create() skips this method: set url_hash with hash_url().
+        """
+        self.url_hash = hash_url(self.original_url)
+        if validate:
+            self.full_clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -58,25 +130,229 @@ class ShortURL(models.Model):
 
 
 class Click(models.Model):
-    """Model tracking clicks on short URLs."""
+    """
+    Model tracking clicks on short URLs.
+
+    On PostgreSQL the table is range-partitioned by month on clicked_at
+    (migration 0008), with a primary key of (id, clicked_at), and
+    clicked_at has a BRIN index instead of a B-tree (migration 0009).
+    """
     short_url = models.ForeignKey(
         ShortURL,
         on_delete=models.CASCADE,
         related_name='clicks',
+        # Covered by the (short_url, clicked_at) index below
+        db_index=False,
         help_text="Associated shortened URL"
     )
     clicked_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
         help_text="Timestamp when the click occurred"
     )
 
     class Meta:
         indexes = [
-            models.Index(fields=['-clicked_at']),
+            # Per-link time windows are a single index-only range scan
+            models.Index(fields=['short_url', 'clicked_at'], name='short_urls_click_url_time_idx'),
         ]
         ordering = ['-clicked_at']
         verbose_name = "URL Click"
         verbose_name_plural = "URL Clicks"
 
     def __str__(self):
-        return f"Click on {self.short_url} at {self.clicked_at}"
\ No newline at end of file
+        return f"Click on {self.short_url} at {self.clicked_at}"
+
+
+class ClickBucket(models.Model):
+    """Number of clicks on a short URL within one hour."""
+    short_url = models.ForeignKey(
+        ShortURL,
+        on_delete=models.CASCADE,
+        related_name='click_buckets',
+        help_text="Associated shortened URL"
+    )
+    hour = models.DateTimeField(
+        help_text="Start of the hour the clicks belong to"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of clicks within the hour"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['short_url', 'hour'], name='unique_click_bucket'),
+        ]
+        ordering = ['-hour']
+        verbose_name = "URL Click Bucket"
+        verbose_name_plural = "URL Click Buckets"
+
+    def __str__(self):
+        return f"{self.count} clicks on {self.short_url} at {self.hour}"
+
+
+
+class KeySequence(models.Model):
+    """Named counter handed out in blocks by the sequence key strategy."""
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="Sequence name"
+    )
+    next_value = models.PositiveBigIntegerField(
+        default=0,
+        help_text="First value of the next unallocated block"
+    )
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+
+class PooledShortKey(models.Model):
+    """Pre-generated unused short key waiting to be claimed by a create."""
+    short_key = models.CharField(
+        max_length=constants.SHORT_KEY_MAX_LENGTH,
+        unique=True,
+        help_text="Reserved short key"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the key was added to the pool"
+    )
+
+    def __str__(self):
+        return self.short_key
+
+
+class StatsLeaderboardEntry(models.Model):
+    """
+    Precomputed row of the stats leaderboard: the top links by all-time
+    clicks with their windowed counters, rebuilt by refresh_stats_leaderboard.
+    """
+    rank = models.PositiveIntegerField(
+        unique=True,
+        help_text="Position in the leaderboard, starting at 1"
+    )
+    short_url = models.ForeignKey(
+        ShortURL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Associated shortened URL"
+    )
+    short_key = models.CharField(
+        max_length=constants.SHORT_KEY_MAX_LENGTH,
+        help_text="Short key at refresh time"
+    )
+    original_url = models.URLField(
+        max_length=constants.MAX_URL_LENGTH,
+        help_text="Original URL at refresh time"
+    )
+    last_hour_clicks = models.PositiveIntegerField(default=0)
+    last_day_clicks = models.PositiveIntegerField(default=0)
+    all_time_clicks = models.PositiveBigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(
+        help_text="Timestamp of the refresh that produced this row"
+    )
+
+    class Meta:
+        ordering = ['rank']
+        verbose_name = "Stats Leaderboard Entry"
+        verbose_name_plural = "Stats Leaderboard Entries"
+
+    def __str__(self):
+        return f"#{self.rank} {self.short_key}: {self.all_time_clicks}"
+
+
+class APIKey(models.Model):
+    """
+    API key of a user for APIKeyAuthentication. The key itself is shown
+    once when issued; only its HMAC digest is stored.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='api_keys',
+        help_text="User the key authenticates as"
+    )
+    name = models.CharField(
+        max_length=100,
+        help_text="What the key is used for"
+    )
+    prefix = models.CharField(
+        max_length=constants.API_KEY_PREFIX_LENGTH,
+        editable=False,
+        help_text="First characters of the key, to tell keys apart"
+    )
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        editable=False,
+        help_text="HMAC-SHA256 of the key"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the key was issued"
+    )
+    revoked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Timestamp when the key was revoked"
+    )
+
+    class Meta:
+        verbose_name = "API Key"
+        verbose_name_plural = "API Keys"
+
+    @property
+    def is_revoked(self):
+        return self.revoked_at is not None
+
+    def __str__(self):
+        return f"{self.name} ({self.prefix}…)"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key header of a create request, so that a retried request
+    returns the link made by the first one instead of a new link.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="User that sent the request; keys are scoped per user"
+    )
+    key = models.CharField(
+        max_length=constants.IDEMPOTENCY_KEY_MAX_LENGTH,
+        help_text="Client-chosen Idempotency-Key header value"
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the request parameters, to detect a reused key"
+    )
+    short_url = models.ForeignKey(
+        ShortURL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Link returned to the first request"
+    )
+    created = models.BooleanField(
+        help_text="Whether the first request created the link or reused one"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        help_text="Timestamp of the first request"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+    def __str__(self):
+        return f"{self.key} → {self.short_url_id}"
@@ -1,6 +1,266 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
 
-class CustomPagination(PageNumberPagination):
-    page_size = 5
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import ShortURL
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Cheap row count estimate: pg_class.reltuples for a whole table, the
+    planner's row estimate for a filtered queryset. Backends without
+    statistics fall back to an exact COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # -1 means the table has never been analyzed
+            if row and row[0] >= 0:
+                return row[0]
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset (seek) pagination over a fixed two-column ordering,
+    e.g. ('-total_clicks', '-id'). The cursor carries the ordering values of
+    the last row ('after'), so every page is an index range scan instead of
+    an OFFSET, plus any cursor_state the view sets on the paginator.
+
+    No COUNT(*) runs unless the client asks for ?count=exact or
+    ?count=estimate.
+    """
+    ordering = ('-id',)
+    page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 50
\ No newline at end of file
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimate')
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_state = {}
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def _fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def cursor_payload(self, request):
+        """
+        The request's decoded cursor, {'after': [...], **cursor_state}, or
+        None on the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors issued before the state was added are bare value lists
+        if isinstance(payload, list):
+            payload = {'after': payload}
+        if not isinstance(payload, dict) or not isinstance(payload.get('after'), list):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+    def _decode_cursor(self, request, queryset):
+        payload = self.cursor_payload(request)
+        if payload is None:
+            return None
+        values = payload['after']
+        try:
+            fields = self._fields()
+            if len(values) != len(fields):
+                raise ValueError
+            return [
+                queryset.model._meta.get_field(name).to_python(value)
+                for name, value in zip(fields, values)
+            ]
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode_values(self, values):
+        # DjangoJSONEncoder truncates datetimes to milliseconds, which would
+        # skip rows created within the same millisecond as the last one
+        payload = {
+            'after': [value.isoformat() if isinstance(value, datetime) else value for value in values],
+            **self.cursor_state,
+        }
+        encoded = urlsafe_b64encode(json.dumps(payload, cls=DjangoJSONEncoder).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _encode_cursor(self, instance):
+        return self._encode_values([getattr(instance, name) for name in self._fields()])
+
+    def _seek(self, values):
+        # (a, b) after (va, vb) in the page direction, spelled out so that the
+        # database can use a composite index on (a, b)
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            field = name.lstrip('-')
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def filter_queryset(self, queryset, request):
+        """Apply the cursor and ordering without slicing (used for exports)."""
+        values = self.after = self._decode_cursor(request, queryset)
+        queryset = queryset.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values))
+        return queryset
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        rows = list(self.filter_queryset(queryset, request)[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._encode_cursor(self.page[-1])
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {
+                    'type': 'integer',
+                    'description': 'Only present when requested via the count parameter',
+                },
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Include an exact or estimated total count.',
+                'schema': {'type': 'string', 'enum': list(self.count_modes)},
+            },
+        ]
+
+
+class ShortURLPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 5
+    max_page_size = 50
+
+
+class StatsPagination(KeysetPagination):
+    ordering = ('-total_clicks', '-id')
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['refreshed_at'] = {
+            'type': 'string',
+            'format': 'date-time',
+            'description': 'When the returned statistics were computed',
+        }
+        return response_schema
+
+
+class LeaderboardPagination(StatsPagination):
+    """
+    Pages over the leaderboard snapshot in the live ordering, so that one
+    cursor position is valid for snapshot and live pages alike. The
+    snapshot only holds the top links: after its last row the next link
+    continues with live pages when links ranked below it exist.
+    """
+    # The same order as rank; the snapshot is small enough to sort
+    ordering = ('-all_time_clicks', '-short_url_id')
+
+    def get_count(self, queryset, request):
+        # The listing covers every link, not just the snapshot
+        return super().get_count(ShortURL.objects.all(), request)
+
+    def get_next_link(self):
+        if self.has_next:
+            return super().get_next_link()
+        position = [getattr(self.page[-1], name) for name in self._fields()] if self.page else self.after
+        if position is None:
+            return None
+        live = StatsPagination()
+        live.base_url = self.base_url
+        if not ShortURL.objects.filter(live._seek(position)).exists():
+            return None
+        return live._encode_values(position)
@@ -0,0 +1,94 @@
+"""
+Primary/replica database routing.
+
+Reads go to a random alias from SHORT_URLS_DB_REPLICAS, writes to the
+primary ('default'). Reads stay on the primary while it is inside a
+transaction, for the rest of a request that has written, and for
+SHORT_URLS_REPLICA_STICKY_SECONDS after a write by the same client
+(see ReplicaStickinessMiddleware), so a client reads its own writes.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .constants import SHORT_URLS_CACHE_ALIAS
+from .services.shared_cache import safe_cache_call
+
+STICKY_COOKIE = 'short_urls_primary'
+USER_PIN_KEY = 'replica:v1:pin:{}'
+
+
+class RoutingState:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar('short_urls_routing_state', default=None)
+
+
+@contextmanager
+def routing_state(pinned: bool = False):
+    state = RoutingState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def pin_to_primary() -> None:
+    """Send the remaining reads of the current request to the primary."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def _pin_cache_call(method: str, *args):
+    return safe_cache_call(caches[SHORT_URLS_CACHE_ALIAS], method, *args)
+
+
+def remember_user_write(user_pk) -> None:
+    """Keep this user's reads on the primary for the sticky period."""
+    _pin_cache_call('set', USER_PIN_KEY.format(user_pk), True, settings.SHORT_URLS_REPLICA_STICKY_SECONDS)
+
+
+def pin_if_user_wrote(user_pk) -> None:
+    """Pin the current request if its user wrote within the sticky period."""
+    if _pin_cache_call('get', USER_PIN_KEY.format(user_pk)):
+        pin_to_primary()
+
+
+def use_primary() -> bool:
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return True
+    state = _state.get()
+    return state is not None and (state.pinned or state.wrote)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.SHORT_URLS_DB_REPLICAS
+        if not replicas or use_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so any two objects may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
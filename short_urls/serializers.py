@@ -15,8 +15,10 @@ class ShortURLSerializer(serializers.ModelSerializer):
             'created_at',
             'expires_at',
             'is_active',
+            'redirect_status',
+            'updated_at',
         ]
-        read_only_fields = ['id', 'short_key', 'created_at']
+        read_only_fields = ['id', 'short_key', 'created_at', 'updated_at']
 
 
 class ShortURLStatsSerializer(serializers.ModelSerializer):
@@ -54,6 +56,7 @@ class CreateShortURLSerializer(serializers.Serializer):
         required=False,
         allow_blank=True,
         allow_null=True,
+        max_length=constants.SHORT_KEY_MAX_LENGTH,
         validators=[
             RegexValidator(
                 regex=constants.SHORT_KEY_REGEX,
@@ -62,16 +65,14 @@ class CreateShortURLSerializer(serializers.Serializer):
             )
         ]
     )
-
-    def validate_custom_key(self, value):
-        if not value:
-            return value
-        
-        if ShortURL.objects.filter(short_key=value).exists():
-            raise serializers.ValidationError(
-                "This custom key is already in use"
-            )
-        return value
+    redirect_status = serializers.ChoiceField(
+        choices=constants.REDIRECT_STATUS_CHOICES,
+        default=constants.DEFAULT_REDIRECT_STATUS
+    )
+    reuse_existing = serializers.BooleanField(
+        required=False,
+        help_text="Return an existing live link to the same URL instead of creating one"
+    )
 
     def create(self, validated_data):
         return create_short_url(
@@ -81,5 +82,58 @@ class CreateShortURLSerializer(serializers.Serializer):
         )
 
 
+class BulkCreateShortURLItemSerializer(CreateShortURLSerializer):
+    """
+    One item of a bulk create request. Custom key collisions are checked
+    for the whole batch at once by BulkCreateShortURLService.
+    """
+    reuse_existing = None
+
+
+class BulkCreateResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=['created', 'error'])
+    data = ShortURLSerializer(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class BulkCreateResponseSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = BulkCreateResultSerializer(many=True)
+
+
 class DeactivateResponseSerializer(serializers.Serializer):
-    status = serializers.CharField()
\ No newline at end of file
+    status = serializers.CharField()
+
+class BatchShortKeysSerializer(serializers.Serializer):
+    short_keys = serializers.ListField(
+        child=serializers.CharField(max_length=constants.SHORT_KEY_MAX_LENGTH),
+        allow_empty=False,
+        max_length=constants.BATCH_LOOKUP_MAX_KEYS
+    )
+
+
+class BatchStatsResultSerializer(serializers.Serializer):
+    short_key = serializers.CharField()
+    status = serializers.ChoiceField(choices=['found', 'not_found'])
+    data = ShortURLStatsSerializer(required=False)
+
+
+class BatchStatsResponseSerializer(serializers.Serializer):
+    results = BatchStatsResultSerializer(many=True)
+
+
+class ResolvedKeySerializer(serializers.Serializer):
+    short_key = serializers.CharField()
+    status = serializers.ChoiceField(choices=['live', 'gone', 'not_found'])
+    original_url = serializers.CharField(allow_null=True)
+    redirect_status = serializers.IntegerField(allow_null=True)
+    expires_at = serializers.DateTimeField(allow_null=True)
+    max_age = serializers.IntegerField(
+        help_text="Seconds the redirect may be cached, as in its Cache-Control header"
+    )
+
+
+class BatchResolveResponseSerializer(serializers.Serializer):
+    results = ResolvedKeySerializer(many=True)
@@ -1,30 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
 from django.utils import timezone
-from django.db.models import Q, Count, QuerySet
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from rest_framework.exceptions import NotFound
-from ..models import ShortURL
+from ..models import ShortURL, Click, ClickBucket
+from ..instrumentation import timed
+from .click_rollup import ClickRollupService
+from ..constants import STATS_DETAIL_ETAG_SECONDS, STATS_EXPORT_CHUNK_SIZE
 
 
 class ShortURLStatsService:
     """
     Service for obtaining statistics on short URLs.
+
+    Windowed counters are read from hourly buckets; only clicks in the
+    leading partial hour of a window are counted from the raw Click table,
+    as an index-only range count on (short_url_id, clicked_at).
     """
 
     @staticmethod
-    def _annotate_stats(queryset: QuerySet) -> QuerySet:
+    def _window_clicks(since: datetime):
+        boundary = ClickRollupService.next_hour_boundary(since)
+        buckets = ClickBucket.objects.filter(
+            short_url=OuterRef('pk'),
+            hour__gte=boundary
+        ).order_by().values('short_url').annotate(total=Sum('count')).values('total')
+        raw_clicks = Click.objects.filter(
+            short_url=OuterRef('pk'),
+            clicked_at__gt=since,
+            clicked_at__lt=boundary
+        ).order_by().values('short_url').annotate(total=Count('*')).values('total')
+
+        return Coalesce(Subquery(buckets), Value(0)) + Coalesce(Subquery(raw_clicks), Value(0))
+
+    @classmethod
+    def _annotate_stats(cls, queryset: QuerySet) -> QuerySet:
         now = timezone.now()
         hour_ago = now - timezone.timedelta(hours=1)
         day_ago = now - timezone.timedelta(days=1)
 
         return queryset.annotate(
-            last_hour_clicks=Count(
-                'clicks',
-                filter=Q(clicks__clicked_at__gt=hour_ago)
-            ),
-            last_day_clicks=Count(
-                'clicks',
-                filter=Q(clicks__clicked_at__gt=day_ago)
-            ),
-            all_time_clicks=Count('clicks')
+            last_hour_clicks=cls._window_clicks(hour_ago),
+            last_day_clicks=cls._window_clicks(day_ago),
+            all_time_clicks=F('total_clicks')
         )
 
     @staticmethod
@@ -38,16 +58,56 @@ class ShortURLStatsService:
         }
 
     @classmethod
-    def list_all_stats(cls) -> list[dict]:
-        queryset = cls._annotate_stats(ShortURL.objects.all()).order_by('-all_time_clicks')
-        return [cls._format_stats(obj) for obj in queryset]
+    def stats_queryset(cls) -> QuerySet:
+        return cls._annotate_stats(ShortURL.objects.all()).order_by('-total_clicks', '-id')
+
+    @classmethod
+    def iter_stats(cls, queryset: QuerySet = None, chunk_size: int = STATS_EXPORT_CHUNK_SIZE):
+        """
+        Yield formatted stats row by row; on PostgreSQL the queryset is read
+        through a server-side cursor.
+        """
+        if queryset is None:
+            queryset = cls.stats_queryset()
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield cls._format_stats(obj)
+
+    @classmethod
+    def detail_queryset(cls, short_key: str) -> QuerySet:
+        return cls._annotate_stats(
+            ShortURL.objects.filter(short_key=short_key).only('short_key', 'original_url', 'total_clicks')
+        )
+
+    @classmethod
+    @timed('stats')
+    def batch_stats(cls, short_keys: list[str]) -> list[Optional[dict]]:
+        """
+        Stats for each key in request order (None for unknown keys), from
+        one query for the whole batch.
+        """
+        queryset = cls._annotate_stats(
+            ShortURL.objects.filter(short_key__in=set(short_keys)).only('short_key', 'original_url', 'total_clicks')
+        )
+        found = {obj.short_key: cls._format_stats(obj) for obj in queryset}
+        return [found.get(short_key) for short_key in short_keys]
+
+    @classmethod
+    def detail_version(cls, short_key: str) -> tuple:
+        """
+        Cheap stand-in for detail_stats() in validators: changes with every
+        counted click or edit of the link, and every STATS_DETAIL_ETAG_SECONDS
+        as clicks age out of the windows.
+        """
+        version = ShortURL.objects.filter(short_key=short_key).values_list('total_clicks', 'updated_at').first()
+        if version is None:
+            raise NotFound("ShortURL not found")
+        return (*version, int(timezone.now().timestamp() // STATS_DETAIL_ETAG_SECONDS))
 
     @classmethod
+    @timed('stats')
     def detail_stats(cls, short_key: str) -> dict:
         try:
-            obj = cls._annotate_stats(
-                ShortURL.objects.filter(short_key=short_key)
-            ).get()
+            obj = cls.detail_queryset(short_key).get()
         except ShortURL.DoesNotExist:
             raise NotFound("ShortURL not found")
 
@@ -0,0 +1,94 @@
+import secrets
+from typing import Optional
+
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from ..constants import (
+    API_KEY_BYTES,
+    API_KEY_PREFIX_LENGTH,
+    API_KEY_CACHE_MAX_SIZE,
+    API_KEY_CACHE_TTL_SECONDS,
+)
+from ..models import APIKey
+from .redirect_cache import LocalLRUCache
+
+
+class APIKeyService:
+    """
+    Service for issuing, verifying and revoking API keys.
+
+    A key is looked up by its HMAC-SHA256 digest (keyed with SECRET_KEY),
+    which costs microseconds instead of a password hash. Verified users are
+    kept in a per-process LRU for API_KEY_CACHE_TTL_SECONDS; revoking drops
+    the entries of this process, other processes stop accepting the key
+    once their entry expires. Rotating SECRET_KEY invalidates every key.
+    """
+
+    KEY_SALT = 'short_urls.APIKey'
+
+    _verified = LocalLRUCache(API_KEY_CACHE_MAX_SIZE)
+
+    @classmethod
+    def digest(cls, raw_key: str) -> str:
+        return salted_hmac(cls.KEY_SALT, raw_key, algorithm='sha256').hexdigest()
+
+    @classmethod
+    def assign(cls, api_key: APIKey) -> str:
+        """
+        Generate a key for an unsaved APIKey and return it; the caller
+        must show it to the user, it cannot be recovered later.
+        """
+        raw_key = secrets.token_urlsafe(API_KEY_BYTES)
+        api_key.prefix = raw_key[:API_KEY_PREFIX_LENGTH]
+        api_key.digest = cls.digest(raw_key)
+        return raw_key
+
+    @classmethod
+    def issue(cls, user: AbstractBaseUser, name: str) -> tuple[APIKey, str]:
+        """
+        Create a key for `user`. Returns the model and the raw key.
+        """
+        api_key = APIKey(user=user, name=name)
+        raw_key = cls.assign(api_key)
+        api_key.save()
+        return api_key, raw_key
+
+    @classmethod
+    def verify(cls, raw_key: str) -> Optional[AbstractBaseUser]:
+        """
+        Return the active user the key belongs to, or None if the key is
+        unknown, revoked or its user is inactive.
+        """
+        digest = cls.digest(raw_key)
+        user = cls._verified.get(digest)
+        if user is not None:
+            return user
+
+        api_key = (
+            APIKey.objects
+            .select_related('user')
+            .filter(digest=digest, revoked_at__isnull=True)
+            .first()
+        )
+        if api_key is None or not api_key.user.is_active:
+            return None
+        cls._verified.set(digest, api_key.user, API_KEY_CACHE_TTL_SECONDS)
+        return api_key.user
+
+    @classmethod
+    def revoke(cls, api_keys: QuerySet) -> int:
+        """
+        Revoke the given keys. Returns the number of keys revoked.
+        """
+        digests = list(api_keys.filter(revoked_at__isnull=True).values_list('digest', flat=True))
+        revoked = APIKey.objects.filter(digest__in=digests).update(revoked_at=timezone.now())
+        for digest in digests:
+            cls._verified.delete(digest)
+        return revoked
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls._verified.clear()
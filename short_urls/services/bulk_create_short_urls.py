@@ -0,0 +1,117 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import ShortURL, hash_url
+from ..constants import (
+    BULK_CREATE_CHUNK_SIZE,
+    SHORT_URL_DEFAULT_EXPIRE_DAYS,
+    MAX_SHORT_KEY_GENERATION_ATTEMPTS,
+    DEFAULT_REDIRECT_STATUS,
+)
+from .redirect_cache import redirect_cache
+from .short_key_filter import short_key_filter
+from .short_key_generator import ShortKeyGenerator
+
+
+class BulkCreateShortURLService:
+    """
+    Service for creating many short links at once.
+
+    Items are already validated dicts (original_url, expires_days,
+    custom_key). Custom key collisions are checked with one set-based query,
+    generated keys are produced in bulk and rows are inserted with
+    bulk_create in chunks. One failed item never fails the whole batch.
+    """
+
+    @staticmethod
+    def _build(item: dict, short_key: str, now) -> ShortURL:
+        expire_days = item.get('expires_days') or SHORT_URL_DEFAULT_EXPIRE_DAYS
+        return ShortURL(
+            original_url=item['original_url'],
+            url_hash=hash_url(item['original_url']),
+            short_key=short_key,
+            expires_at=now + timezone.timedelta(days=expire_days),
+            is_active=True,
+            redirect_status=item.get('redirect_status') or DEFAULT_REDIRECT_STATUS
+        )
+
+    @staticmethod
+    def _insert_one(obj: ShortURL, generated: bool) -> bool:
+        attempts = MAX_SHORT_KEY_GENERATION_ATTEMPTS if generated else 1
+        for _ in range(attempts):
+            try:
+                with transaction.atomic():
+                    ShortURL.objects.bulk_create([obj])
+                return True
+            except IntegrityError:
+                obj.short_key = ShortKeyGenerator.generate()
+        return False
+
+    @classmethod
+    def _insert_chunk(cls, objs: list[tuple[int, ShortURL, bool]], results: list) -> None:
+        try:
+            with transaction.atomic():
+                ShortURL.objects.bulk_create([obj for _, obj, _ in objs])
+        except IntegrityError:
+            # A key was taken concurrently: fall back to row-by-row inserts,
+            # regenerating keys that were not chosen by the client
+            for index, obj, generated in objs:
+                if cls._insert_one(obj, generated):
+                    results[index] = obj
+                elif generated:
+                    results[index] = {'short_key': ["Failed to generate unique key"]}
+                else:
+                    results[index] = {'custom_key': ["This custom key is already in use"]}
+        else:
+            for index, obj, _ in objs:
+                results[index] = obj
+
+    @classmethod
+    def execute(cls, items: list[dict]) -> list:
+        """
+        Returns a list aligned with `items`: a ShortURL for every created
+        link, or a dict of errors for every rejected one.
+        """
+        results = [None] * len(items)
+        now = timezone.now()
+
+        custom_keys = [item.get('custom_key') for item in items if item.get('custom_key')]
+        taken = set(
+            ShortURL.objects.filter(short_key__in=set(custom_keys)).values_list('short_key', flat=True)
+        )
+        duplicates = {key for key, count in Counter(custom_keys).items() if count > 1}
+        seen = set()
+
+        pending = []
+        for index, item in enumerate(items):
+            custom_key = item.get('custom_key')
+            if not custom_key:
+                pending.append((index, None))
+                continue
+            if custom_key in taken:
+                results[index] = {'custom_key': ["This custom key is already in use"]}
+            elif custom_key in duplicates and custom_key in seen:
+                results[index] = {'custom_key': ["This custom key is repeated in the batch"]}
+            else:
+                pending.append((index, custom_key))
+            seen.add(custom_key)
+
+        reserved = set(custom_keys)
+        for start in range(0, len(pending), BULK_CREATE_CHUNK_SIZE):
+            chunk = pending[start:start + BULK_CREATE_CHUNK_SIZE]
+            generated = iter(ShortKeyGenerator.generate_many(
+                sum(1 for _, key in chunk if key is None), exclude=reserved
+            ))
+            objs = [
+                (index, cls._build(items[index], short_key or next(generated), now), short_key is None)
+                for index, short_key in chunk
+            ]
+            cls._insert_chunk(objs, results)
+
+        for result in results:
+            if isinstance(result, ShortURL):
+                redirect_cache.invalidate(result.short_key, broadcast=False)
+                short_key_filter.created(result)
+        return results
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import Click, ClickBucket
+from ..constants import CLICK_PARTITION_MONTHS_AHEAD, CLICK_PRUNE_BATCH_SIZE
+
+
+class ClickPartitionService:
+    """
+    Service for managing Click storage over time.
+
+    On PostgreSQL the click table is range-partitioned by month on
+    clicked_at (see migration 0008): future partitions are created ahead of
+    time and whole partitions past the retention window are dropped, which
+    costs no DELETE or vacuum. Other databases fall back to batched DELETEs.
+    """
+
+    DEFAULT_PARTITION_SUFFIX = 'default'
+
+    @staticmethod
+    def month_start(moment: datetime) -> datetime:
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def next_month(cls, moment: datetime) -> datetime:
+        return cls.month_start(cls.month_start(moment) + timedelta(days=32))
+
+    @staticmethod
+    def partitioned() -> bool:
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+                [Click._meta.db_table]
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def partition_name(month: datetime) -> str:
+        return f"{Click._meta.db_table}_p{month:%Y%m}"
+
+    @classmethod
+    def list_partitions(cls) -> list[str]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname",
+                [Click._meta.db_table]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def create_partition(cls, month: datetime) -> bool:
+        """
+        Create the partition for `month`. Rows that already landed in the
+        default partition are moved into it before it is attached.
+        """
+        name = cls.partition_name(month)
+        if name in cls.list_partitions():
+            return False
+
+        quote = connection.ops.quote_name
+        parent = quote(Click._meta.db_table)
+        default = quote(f"{Click._meta.db_table}_{cls.DEFAULT_PARTITION_SUFFIX}")
+        lower, upper = month, cls.next_month(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {parent} INCLUDING DEFAULTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} "
+                f"WHERE clicked_at >= %s AND clicked_at < %s RETURNING *) "
+                f"INSERT INTO {quote(name)} SELECT * FROM moved",
+                [lower, upper]
+            )
+            cursor.execute(
+                f"ALTER TABLE {parent} ATTACH PARTITION {quote(name)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [lower, upper]
+            )
+        return True
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead: int = CLICK_PARTITION_MONTHS_AHEAD) -> list[str]:
+        """Create partitions from the current month up to `months_ahead`."""
+        created = []
+        month = cls.month_start(timezone.now())
+        for _ in range(months_ahead + 1):
+            if cls.create_partition(month):
+                created.append(cls.partition_name(month))
+            month = cls.next_month(month)
+        return created
+
+    @classmethod
+    def drop_expired_partitions(cls, cutoff: datetime) -> list[str]:
+        """Drop every monthly partition that lies entirely before `cutoff`."""
+        dropped = []
+        quote = connection.ops.quote_name
+        prefix = f"{Click._meta.db_table}_p"
+        for name in cls.list_partitions():
+            if not name.startswith(prefix):
+                continue
+            month = datetime.strptime(name[len(prefix):], '%Y%m').replace(tzinfo=cutoff.tzinfo)
+            if cls.next_month(month) > cutoff:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+            dropped.append(name)
+        return dropped
+
+    @staticmethod
+    def delete_in_batches(queryset, batch_size: int = CLICK_PRUNE_BATCH_SIZE) -> int:
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+    @classmethod
+    def prune(cls, retention_days: int) -> dict:
+        """
+        Remove raw clicks and hourly buckets older than the retention window.
+        """
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        result = {'cutoff': cutoff, 'dropped_partitions': [], 'deleted_clicks': 0}
+        if cls.partitioned():
+            # Whole months only: a partially expired partition waits for the
+            # next run instead of turning into a row-by-row DELETE
+            result['dropped_partitions'] = cls.drop_expired_partitions(cutoff)
+        else:
+            result['deleted_clicks'] = cls.delete_in_batches(Click.objects.filter(clicked_at__lt=cutoff))
+        result['deleted_buckets'] = cls.delete_in_batches(ClickBucket.objects.filter(hour__lt=cutoff))
+        return result
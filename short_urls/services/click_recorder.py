@@ -0,0 +1,269 @@
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import ShortURL, Click
+from ..routers import routing_state
+from .click_rollup import ClickRollupService
+from ..constants import (
+    CLICK_RECORDER_BATCH_SIZE,
+    CLICK_RECORDER_FLUSH_INTERVAL_SECONDS,
+    CLICK_RECORDER_MAX_QUEUE_SIZE,
+    CLICK_RECORDER_ENQUEUE_TIMEOUT_SECONDS,
+    CLICK_RECORDER_OVERFLOW_POLICIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ClickEvent(NamedTuple):
+    short_url_id: int
+    clicked_at: datetime
+
+
+class ClickRecorder:
+    """
+    Buffers click events in a bounded in-process queue and writes them with
+    bulk_create from a background thread, in batches bounded by size and time.
+
+    When the queue is full the overflow policy decides what happens:
+    'drop_newest' rejects the new event, 'drop_oldest' evicts the oldest
+    queued one, and 'block' waits up to enqueue_timeout before dropping.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        overflow_policy: Optional[str] = None,
+        batch_size: int = CLICK_RECORDER_BATCH_SIZE,
+        flush_interval: float = CLICK_RECORDER_FLUSH_INTERVAL_SECONDS,
+        max_queue_size: int = CLICK_RECORDER_MAX_QUEUE_SIZE,
+        enqueue_timeout: float = CLICK_RECORDER_ENQUEUE_TIMEOUT_SECONDS,
+        autostart: bool = True,
+    ):
+        if overflow_policy is not None and overflow_policy not in CLICK_RECORDER_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self._mode = mode
+        self._overflow_policy = overflow_policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self.autostart = autostart
+
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._reset_queue()
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def mode(self) -> str:
+        return self._mode or settings.SHORT_URLS_CLICK_RECORDER_MODE
+
+    @property
+    def overflow_policy(self) -> str:
+        return self._overflow_policy or settings.SHORT_URLS_CLICK_OVERFLOW_POLICY
+
+    def _reset_queue(self) -> None:
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._thread = None
+
+    def _ensure_started(self) -> None:
+        # After a fork the parent's thread does not exist in the child
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset_queue()
+        if self._thread is None and self.autostart:
+            self.start()
+
+    def record(self, short_url_id: int, clicked_at: Optional[datetime] = None) -> bool:
+        """
+        Register a click. Returns False if the event was dropped.
+        """
+        event = ClickEvent(short_url_id, clicked_at or timezone.now())
+        if self.mode == 'sync':
+            self.queued += 1
+            self._write([event])
+            return True
+
+        self._ensure_started()
+        if not self._enqueue(event):
+            self.dropped += 1
+            return False
+        self.queued += 1
+        return True
+
+    def arecord(self, short_url_id: int) -> None:
+        """
+        Fire-and-forget variant of record() for async code. Enqueueing is
+        non-blocking; anything that could block (a synchronous write or the
+        'block' overflow policy) runs in a thread without being awaited.
+        """
+        if self.mode != 'sync' and self.overflow_policy != 'block':
+            self.record(short_url_id)
+            return
+        task = asyncio.get_running_loop().create_task(
+            sync_to_async(self.record)(short_url_id, timezone.now())
+        )
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _enqueue(self, event: ClickEvent) -> bool:
+        policy = self.overflow_policy
+        if policy == 'block':
+            try:
+                self._queue.put(event, timeout=self.enqueue_timeout)
+                return True
+            except queue.Full:
+                return False
+
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            if policy != 'drop_oldest':
+                return False
+
+        try:
+            self._queue.get_nowait()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def _collect(self) -> list[ClickEvent]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> list[ClickEvent]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[ClickEvent]) -> None:
+        # A separate routing state: recording a click must not make the
+        # visitor sticky to the primary database
+        with routing_state():
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list[ClickEvent]) -> None:
+        try:
+            try:
+                self._bulk_insert(batch)
+            except IntegrityError:
+                # Some links were deleted after the redirect: keep the rest
+                ids = {event.short_url_id for event in batch}
+                existing = set(
+                    ShortURL.objects.filter(id__in=ids).values_list('id', flat=True)
+                )
+                kept = [event for event in batch if event.short_url_id in existing]
+                self.dropped += len(batch) - len(kept)
+                batch = kept
+                self._bulk_insert(batch)
+        except DatabaseError:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d clicks", len(batch))
+        else:
+            self.flushed += len(batch)
+
+    def _bulk_insert(self, batch: list[ClickEvent]) -> None:
+        with transaction.atomic():
+            Click.objects.bulk_create(
+                [Click(short_url_id=event.short_url_id, clicked_at=event.clicked_at) for event in batch],
+                batch_size=self.batch_size,
+            )
+            ClickRollupService.apply(batch)
+
+    def flush(self) -> int:
+        """
+        Synchronously write everything that is queued. Returns the number of
+        events taken from the queue.
+        """
+        total = 0
+        while True:
+            batch = self._drain()
+            if not batch:
+                return total
+            self._write(batch)
+            total += len(batch)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+                close_old_connections()
+        self.flush()
+        close_old_connections()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='click-recorder', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background flusher and write whatever is still queued.
+        """
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        self._stop_event.set()
+        thread.join(timeout if timeout is not None else self.flush_interval * 5)
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'queued': self.queued,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'pending': self._queue.qsize(),
+        }
+
+
+click_recorder = ClickRecorder()
+atexit.register(click_recorder.stop)
@@ -0,0 +1,80 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+
+from ..models import ShortURL, ClickBucket
+
+
+class ClickRollupService:
+    """
+    Service for keeping hourly click buckets and all-time counters in step
+    with ingested clicks.
+    """
+
+    @staticmethod
+    def hour_of(moment: datetime) -> datetime:
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def next_hour_boundary(cls, moment: datetime) -> datetime:
+        hour = cls.hour_of(moment)
+        return hour if hour == moment else hour + timedelta(hours=1)
+
+    @classmethod
+    def apply(cls, events: Iterable) -> None:
+        """
+        Add (short_url_id, clicked_at) events to the rollups. Must run in the
+        same transaction that inserts the raw clicks.
+        """
+        events = list(events)
+        if not events:
+            return
+
+        buckets = Counter(
+            (event.short_url_id, cls.hour_of(event.clicked_at)) for event in events
+        )
+        totals = Counter(event.short_url_id for event in events)
+
+        with transaction.atomic(savepoint=False):
+            # Concurrent flushers touch the same hot links: take the row
+            # locks in pk order up front so that they queue instead of
+            # deadlocking. NO KEY UPDATE, where supported, still lets click
+            # inserts check their foreign key.
+            list(
+                ShortURL.objects.select_for_update(no_key=connection.features.has_select_for_no_key_update)
+                .filter(pk__in=totals).order_by('pk').values_list('pk', flat=True)
+            )
+            cls._upsert_buckets(sorted(buckets.items()))
+            ShortURL.objects.filter(pk__in=totals).update(
+                total_clicks=F('total_clicks') + Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in totals.items()],
+                    default=Value(0),
+                )
+            )
+
+    @staticmethod
+    def _upsert_buckets(items: list) -> None:
+        if connection.vendor in ('postgresql', 'sqlite'):
+            table = connection.ops.quote_name(ClickBucket._meta.db_table)
+            rows = ', '.join(['(%s, %s, %s)'] * len(items))
+            params = []
+            for (short_url_id, hour), count in items:
+                params.extend([short_url_id, connection.ops.adapt_datetimefield_value(hour), count])
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (short_url_id, hour, count) VALUES {rows} "
+                    f"ON CONFLICT (short_url_id, hour) "
+                    f"DO UPDATE SET count = {table}.count + excluded.count",
+                    params,
+                )
+            return
+
+        for (short_url_id, hour), count in items:
+            updated = ClickBucket.objects.filter(
+                short_url_id=short_url_id, hour=hour
+            ).update(count=F('count') + count)
+            if not updated:
+                ClickBucket.objects.create(short_url_id=short_url_id, hour=hour, count=count)
@@ -1,36 +1,108 @@
+from typing import Optional
+
 from django.utils import timezone
-from django.db import transaction
-from django.core.exceptions import ValidationError as DjangoValidationError
-from ..models import ShortURL
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from ..models import ShortURL, hash_url
+from ..instrumentation import timed
 from .short_key_generator import ShortKeyGenerator
-from ..constants import SHORT_URL_DEFAULT_EXPIRE_DAYS
+from ..constants import (
+    SHORT_URL_DEFAULT_EXPIRE_DAYS,
+    MAX_SHORT_KEY_GENERATION_ATTEMPTS,
+    CREATE_REUSE_EXPIRY_SLACK_SECONDS,
+    DEFAULT_REDIRECT_STATUS,
+)
 
 class CreateShortURLService:
     """
     Service for creating a short link
+
+    Input is expected to be validated already (CreateShortURLSerializer):
+    the service only inserts. Key uniqueness is left to the unique
+    constraint, so a create is one INSERT.
     """
 
     @classmethod
-    def execute(cls, original_url: str, custom_key: str = None, expires_days: int = None) -> ShortURL:
+    @timed('create')
+    def execute(
+        cls,
+        original_url: str,
+        custom_key: str = None,
+        expires_days: int = None,
+        redirect_status: int = None
+    ) -> ShortURL:
         if not original_url:
             raise ValueError("Original URL is required")
 
-        if custom_key:
-            short_key = custom_key
-        else:
-            short_key = ShortKeyGenerator.generate()
-
         expire_days = expires_days or SHORT_URL_DEFAULT_EXPIRE_DAYS
         expiration = timezone.now() + timezone.timedelta(days=expire_days)
 
-        with transaction.atomic():
-            short_url_obj = ShortURL(
+        # Generated keys may collide with an existing row: the unique
+        # constraint is the final check, so retry with a fresh key
+        for _ in range(MAX_SHORT_KEY_GENERATION_ATTEMPTS):
+            short_key = custom_key or ShortKeyGenerator.generate()
+            try:
+                with transaction.atomic():
+                    short_url_obj = ShortURL(
+                        original_url=original_url,
+                        short_key=short_key,
+                        expires_at=expiration,
+                        is_active=True,
+                        redirect_status=redirect_status or DEFAULT_REDIRECT_STATUS
+                    )
+                    short_url_obj.save(validate=False)
+            except IntegrityError:
+                if custom_key:
+                    raise DRFValidationError({'custom_key': ["This custom key is already in use"]})
+                continue
+            return short_url_obj
+
+        raise RuntimeError("Failed to generate unique key after multiple attempts")
+
+    @staticmethod
+    def find_reusable(original_url: str, expires_days: int = None, redirect_status: int = None) -> Optional[ShortURL]:
+        """
+        Return a live link to the same URL that lives at least as long as a
+        new one would (less CREATE_REUSE_EXPIRY_SLACK_SECONDS), or None.
+        Uses the partial url_hash index; original_url guards against collisions.
+        """
+        expire_days = expires_days or SHORT_URL_DEFAULT_EXPIRE_DAYS
+        min_expiration = (
+            timezone.now()
+            + timezone.timedelta(days=expire_days)
+            - timezone.timedelta(seconds=CREATE_REUSE_EXPIRY_SLACK_SECONDS)
+        )
+        return (
+            ShortURL.objects.active()
+            .filter(
+                url_hash=hash_url(original_url),
                 original_url=original_url,
-                short_key=short_key,
-                expires_at=expiration,
-                is_active=True
+                redirect_status=redirect_status or DEFAULT_REDIRECT_STATUS,
+                expires_at__gte=min_expiration
             )
-            short_url_obj.full_clean() 
-            short_url_obj.save()
+            .order_by('-expires_at')
+            .first()
+        )
 
-        return short_url_obj
+    @classmethod
+    def get_or_create(
+        cls,
+        original_url: str,
+        custom_key: str = None,
+        expires_days: int = None,
+        redirect_status: int = None,
+        reuse_existing: bool = False
+    ) -> tuple[ShortURL, bool]:
+        """
+        Like execute(), but with reuse_existing a live link to the same URL
+        is returned instead of a new one. A custom key is always created.
+        Returns the link and whether it was created.
+        """
+        if reuse_existing and not custom_key:
+            short_url_obj = cls.find_reusable(original_url, expires_days, redirect_status)
+            if short_url_obj is not None:
+                return short_url_obj, False
+        short_url_obj = cls.execute(
+            original_url, custom_key=custom_key, expires_days=expires_days, redirect_status=redirect_status
+        )
+        return short_url_obj, True
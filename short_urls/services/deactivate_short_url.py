@@ -17,6 +17,8 @@ class DeactivateShortURLService:
 
         with transaction.atomic():
             short_url.is_active = False
-            short_url.save()
+            # Only is_active changes; full validation would also reject
+            # deactivating an already expired link
+            short_url.save(update_fields=['is_active', 'updated_at'], validate=False)
 
         return short_url
@@ -0,0 +1,106 @@
+import hashlib
+import json
+from typing import Callable, NamedTuple, Optional
+
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from ..models import IdempotencyKey, ShortURL
+from ..constants import IDEMPOTENCY_KEY_TTL_SECONDS
+
+
+class IdempotencyKeyReused(APIException):
+    """
+    The Idempotency-Key was already used for a request with other parameters.
+    """
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key was already used with different parameters"
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotentResult(NamedTuple):
+    short_url: ShortURL
+    created: bool
+    replayed: bool
+
+
+class IdempotentCreateService:
+    """
+    Service for creates carrying an Idempotency-Key header.
+
+    The first request stores (user, key) -> link in IdempotencyKey, inside
+    the transaction that creates the link. A retry within
+    IDEMPOTENCY_KEY_TTL_SECONDS is answered from that row with one indexed
+    lookup. Concurrent requests with the same key race on the unique
+    constraint: the loser rolls back its link and returns the winner's.
+    """
+
+    @staticmethod
+    def request_hash(params: dict) -> str:
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def _cutoff():
+        return timezone.now() - timezone.timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+
+    @classmethod
+    def lookup(cls, user: AbstractBaseUser, key: str, request_hash: str) -> Optional[IdempotentResult]:
+        """
+        Return the stored result for the key, or None when it is new.
+        Raises IdempotencyKeyReused when the parameters differ.
+        """
+        record = (
+            IdempotencyKey.objects
+            .select_related('short_url')
+            .filter(user=user, key=key, created_at__gte=cls._cutoff())
+            .first()
+        )
+        if record is None:
+            return None
+        if record.request_hash != request_hash:
+            raise IdempotencyKeyReused()
+        return IdempotentResult(record.short_url, record.created, True)
+
+    @classmethod
+    def execute(
+        cls,
+        user: AbstractBaseUser,
+        key: str,
+        params: dict,
+        create: Callable[[], tuple[ShortURL, bool]]
+    ) -> IdempotentResult:
+        """
+        Run create() once per (user, key): `params` are the request
+        parameters create() acts on.
+        """
+        request_hash = cls.request_hash(params)
+        result = cls.lookup(user, key, request_hash)
+        if result is not None:
+            return result
+
+        try:
+            with transaction.atomic():
+                # A record past its TTL no longer counts: the key is free again
+                IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=cls._cutoff()).delete()
+                short_url, created = create()
+                IdempotencyKey.objects.create(
+                    user=user, key=key, request_hash=request_hash, short_url=short_url, created=created
+                )
+        except IntegrityError:
+            result = cls.lookup(user, key, request_hash)
+            if result is None:
+                raise
+            return result
+        return IdempotentResult(short_url, created, False)
+
+    @classmethod
+    def prune(cls) -> int:
+        """
+        Delete records older than IDEMPOTENCY_KEY_TTL_SECONDS. Returns the
+        number of records deleted.
+        """
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cls._cutoff()).delete()
+        return deleted
@@ -0,0 +1,338 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from ..constants import (
+    DEFAULT_REDIRECT_STATUS,
+    REDIRECT_CACHE_MAX_SIZE,
+    REDIRECT_CACHE_TTL_SECONDS,
+    REDIRECT_CACHE_NEGATIVE_TTL_SECONDS,
+    REDIRECT_CACHE_GENERATION_CHECK_SECONDS,
+    REDIRECT_CACHE_INVALIDATION_LOG_SIZE,
+    REDIRECT_CACHE_INVALIDATION_LOG_SECONDS,
+    SHORT_URLS_CACHE_ALIAS,
+)
+from .shared_cache import asafe_cache_call, safe_cache_call
+
+logger = logging.getLogger(__name__)
+
+
+class ResolvedKey(NamedTuple):
+    """
+    Result of resolving a short key: everything the redirect path needs.
+    """
+    short_url_id: Optional[int]
+    original_url: Optional[str]
+    expires_at: Optional[datetime]
+    is_active: bool
+    redirect_status: int = DEFAULT_REDIRECT_STATUS
+
+    @property
+    def exists(self) -> bool:
+        return self.short_url_id is not None
+
+    def is_live(self, now: datetime) -> bool:
+        return self.exists and self.is_active and self.expires_at > now
+
+
+# Negative entry for keys that were never issued
+MISSING = ResolvedKey(None, None, None, False)
+
+
+class LocalLRUCache:
+    """
+    Thread-safe bounded LRU cache with a per-entry deadline.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, deadline = entry
+            if deadline <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        deadline = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedirectCache:
+    """
+    Two-level read-through cache of short key -> ResolvedKey for the
+    redirect path: a per-process LRU in front of the shared Django cache.
+
+    Unknown keys are cached for a short negative TTL, and a live entry is
+    never kept past its expires_at; expired and inactive links are cached
+    as gone for the full TTL. Invalidation replaces the shared entry with
+    an INVALIDATED marker, bumps a generation counter and logs the key under
+    the new generation; every process polls the counter and drops the keys
+    logged since its last check, or all its local entries if it is more
+    than REDIRECT_CACHE_INVALIDATION_LOG_SIZE generations behind or a log
+    entry is missing. For SHORT_URLS_REPLICA_STICKY_SECONDS after an
+    invalidation the key is reported by recently_invalidated(), so that the
+    fill reads the primary rather than a replica that may not have the
+    change yet.
+    """
+
+    KEY_TEMPLATE = 'redirect:v2:{}'
+    GENERATION_KEY = 'redirect:generation'
+    LOG_KEY_TEMPLATE = 'redirect:invalidated:{}'
+    INVALIDATED = 'invalidated'
+
+    def __init__(
+        self,
+        max_size: int = REDIRECT_CACHE_MAX_SIZE,
+        ttl: float = REDIRECT_CACHE_TTL_SECONDS,
+        negative_ttl: float = REDIRECT_CACHE_NEGATIVE_TTL_SECONDS,
+        generation_check_interval: float = REDIRECT_CACHE_GENERATION_CHECK_SECONDS,
+        cache_alias: str = SHORT_URLS_CACHE_ALIAS,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.generation_check_interval = generation_check_interval
+        self.cache_alias = cache_alias
+        self._local = LocalLRUCache(max_size)
+        self._invalidated = LocalLRUCache(max_size)
+        self._generation = None
+        self._next_generation_check = 0.0
+        self.shared_errors = 0
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def _ttl_for(self, resolved: ResolvedKey, ttl: Optional[float] = None) -> float:
+        if not resolved.exists:
+            return self.negative_ttl
+        ttl = self.ttl if ttl is None else ttl
+        if resolved.is_active:
+            remaining = (resolved.expires_at - timezone.now()).total_seconds()
+            # Already expired: the entry is gone for good, cache it as such
+            if remaining > 0:
+                return min(ttl, remaining)
+        return ttl
+
+    def _count_shared_error(self) -> None:
+        self.shared_errors += 1
+
+    def _shared_call(self, method: str, *args, **kwargs):
+        return safe_cache_call(self.shared, method, *args, on_error=self._count_shared_error, **kwargs)
+
+    def _sync_generation(self) -> None:
+        now = time.monotonic()
+        if now < self._next_generation_check:
+            return
+        self._next_generation_check = now + self.generation_check_interval
+
+        generation = self._shared_call('get', self.GENERATION_KEY)
+        if generation is None:
+            self._shared_call('add', self.GENERATION_KEY, 0, timeout=None)
+            generation = 0
+        if generation != self._generation:
+            log_keys = self._log_keys(generation)
+            logged = self._shared_call('get_many', log_keys) if log_keys else None
+            self._advance_generation(generation, log_keys, logged)
+
+    def _log_keys(self, generation) -> Optional[list[str]]:
+        # None when the local entries must all go
+        if self._generation is None or not 0 < generation - self._generation <= REDIRECT_CACHE_INVALIDATION_LOG_SIZE:
+            return None
+        return [self.LOG_KEY_TEMPLATE.format(logged) for logged in range(self._generation + 1, generation + 1)]
+
+    def _advance_generation(self, generation, log_keys: Optional[list[str]], logged: Optional[dict]) -> None:
+        if log_keys and logged is not None and len(logged) == len(log_keys):
+            for short_key in logged.values():
+                self._local.delete(short_key)
+                self._mark_invalidated(short_key)
+        else:
+            self._local.clear()
+        self._generation = generation
+
+    async def _ashared_call(self, method: str, *args, **kwargs):
+        return await asafe_cache_call(self.shared, method, *args, on_error=self._count_shared_error, **kwargs)
+
+    async def _async_sync_generation(self) -> None:
+        now = time.monotonic()
+        if now < self._next_generation_check:
+            return
+        self._next_generation_check = now + self.generation_check_interval
+
+        generation = await self._ashared_call('aget', self.GENERATION_KEY)
+        if generation is None:
+            await self._ashared_call('aadd', self.GENERATION_KEY, 0, timeout=None)
+            generation = 0
+        if generation != self._generation:
+            log_keys = self._log_keys(generation)
+            logged = await self._ashared_call('aget_many', log_keys) if log_keys else None
+            self._advance_generation(generation, log_keys, logged)
+
+    def _bump_generation(self) -> Optional[int]:
+        """The new generation, or None if it is not known."""
+        try:
+            return self.shared.incr(self.GENERATION_KEY)
+        except ValueError:
+            if self._shared_call('add', self.GENERATION_KEY, 1, timeout=None):
+                return 1
+        except Exception:
+            self._count_shared_error()
+            logger.warning("Shared redirect cache incr failed", exc_info=True)
+        return None
+
+    def _mark_invalidated(self, short_key: str) -> None:
+        self._invalidated.set(short_key, True, settings.SHORT_URLS_REPLICA_STICKY_SECONDS)
+
+    def recently_invalidated(self, short_key: str) -> bool:
+        """
+        True while a replica may still serve the key's state from before its
+        last invalidation: a cache fill must then read the primary.
+        """
+        return self._invalidated.get(short_key) is not None
+
+    def _from_shared(self, short_key: str, raw) -> Optional[ResolvedKey]:
+        if raw is None:
+            return None
+        if raw == self.INVALIDATED:
+            self._mark_invalidated(short_key)
+            return None
+        resolved = ResolvedKey(*raw)
+        self._local.set(short_key, resolved, self._ttl_for(resolved))
+        return resolved
+
+    def get(self, short_key: str) -> Optional[ResolvedKey]:
+        self._sync_generation()
+        resolved = self._local.get(short_key)
+        if resolved is not None:
+            return resolved
+        return self._from_shared(short_key, self._shared_call('get', self.KEY_TEMPLATE.format(short_key)))
+
+    async def aget(self, short_key: str) -> Optional[ResolvedKey]:
+        await self._async_sync_generation()
+        resolved = self._local.get(short_key)
+        if resolved is not None:
+            return resolved
+
+        return self._from_shared(short_key, await self._ashared_call('aget', self.KEY_TEMPLATE.format(short_key)))
+
+    def get_many(self, short_keys: list[str]) -> dict[str, ResolvedKey]:
+        """
+        Cached resolutions of the given keys: local hits first, then one
+        shared round trip for the rest. Keys not cached are left out.
+        """
+        self._sync_generation()
+        found = {}
+        missing = []
+        for short_key in short_keys:
+            resolved = self._local.get(short_key)
+            if resolved is None:
+                missing.append(short_key)
+            else:
+                found[short_key] = resolved
+        if not missing:
+            return found
+
+        raw = self._shared_call('get_many', [self.KEY_TEMPLATE.format(short_key) for short_key in missing]) or {}
+        for short_key in missing:
+            resolved = self._from_shared(short_key, raw.get(self.KEY_TEMPLATE.format(short_key)))
+            if resolved is not None:
+                found[short_key] = resolved
+        return found
+
+    def set(self, short_key: str, resolved: ResolvedKey, ttl: Optional[float] = None) -> None:
+        ttl = self._ttl_for(resolved, ttl)
+        if ttl <= 0:
+            return
+        self._local.set(short_key, resolved, ttl)
+        self._shared_call(
+            'set', self.KEY_TEMPLATE.format(short_key), tuple(resolved), timeout=math.ceil(ttl)
+        )
+
+    async def aset(self, short_key: str, resolved: ResolvedKey, ttl: Optional[float] = None) -> None:
+        ttl = self._ttl_for(resolved, ttl)
+        if ttl <= 0:
+            return
+        self._local.set(short_key, resolved, ttl)
+        await self._ashared_call(
+            'aset', self.KEY_TEMPLATE.format(short_key), tuple(resolved), timeout=math.ceil(ttl)
+        )
+
+    def invalidate(self, short_key: str, broadcast: bool = True) -> None:
+        """
+        Drop a key everywhere. Without broadcast other processes only see the
+        change once their local entry expires, which is enough for keys that
+        can at most be negatively cached (freshly created ones).
+        """
+        self._local.delete(short_key)
+        self._mark_invalidated(short_key)
+        self._shared_call(
+            'set', self.KEY_TEMPLATE.format(short_key), self.INVALIDATED,
+            timeout=max(1, settings.SHORT_URLS_REPLICA_STICKY_SECONDS)
+        )
+        if broadcast:
+            generation = self._bump_generation()
+            # Without an entry other processes clear their whole local cache
+            if generation is not None:
+                self._shared_call(
+                    'set', self.LOG_KEY_TEMPLATE.format(generation), short_key,
+                    timeout=REDIRECT_CACHE_INVALIDATION_LOG_SECONDS
+                )
+
+    def clear(self) -> None:
+        """Drop local and shared entries (used by tests and maintenance)."""
+        self._local.clear()
+        self._invalidated.clear()
+        self._shared_call('clear')
+        self._generation = None
+        self._next_generation_check = 0.0
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._local),
+            'hits': self._local.hits,
+            'misses': self._local.misses,
+            'generation': self._generation,
+            'shared_errors': self.shared_errors,
+        }
+
+
+redirect_cache = RedirectCache()
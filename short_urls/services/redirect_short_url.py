@@ -1,7 +1,12 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
 from django.utils import timezone
-from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import NotFound
-from ..models import ShortURL, Click
+from ..models import ShortURL
+from ..instrumentation import timed
+from .click_recorder import click_recorder
+from .redirect_cache import MISSING, ResolvedKey, redirect_cache
+from .short_key_filter import short_key_filter
 
 class GoneException(Exception):
     """
@@ -15,21 +20,153 @@ class RedirectShortURLService:
     Сервис для обработки редиректа по короткому ключу.
     """
 
+    # ResolvedKey fields, in order
+    LOOKUP_FIELDS = ('id', 'original_url', 'expires_at', 'is_active', 'redirect_status')
+
     @classmethod
-    def execute(cls, short_key: str) -> str:
-        now = timezone.now()
-        try:
-            short_url = ShortURL.objects.get(
-                short_key=short_key,
-                is_active=True,
-                expires_at__gt=now
+    def _lookup_queryset(cls):
+        return ShortURL.objects.values_list(*cls.LOOKUP_FIELDS)
+
+    @staticmethod
+    def _for_fill(queryset, short_keys: list[str]):
+        # Right after an invalidation a lagging replica may still return the
+        # old row, which would then be cached again for the full TTL
+        if any(redirect_cache.recently_invalidated(short_key) for short_key in short_keys):
+            return queryset.using(DEFAULT_DB_ALIAS)
+        return queryset
+
+    @classmethod
+    def _lookup_many(cls, short_keys: list[str]) -> dict[str, ResolvedKey]:
+        queryset = cls._for_fill(ShortURL.objects.values_list('short_key', *cls.LOOKUP_FIELDS), short_keys)
+        found = {row[0]: ResolvedKey(*row[1:]) for row in queryset.filter(short_key__in=short_keys)}
+        missing = [short_key for short_key in short_keys if short_key not in found]
+        # As in _lookup(): confirm replica misses on the primary
+        if missing and queryset.db != DEFAULT_DB_ALIAS:
+            found.update(
+                (row[0], ResolvedKey(*row[1:]))
+                for row in queryset.using(DEFAULT_DB_ALIAS).filter(short_key__in=missing)
             )
+        return found
+
+    @classmethod
+    def _lookup(cls, short_key: str) -> ResolvedKey:
+        queryset = cls._for_fill(cls._lookup_queryset(), [short_key])
+        try:
+            return ResolvedKey(*queryset.get(short_key=short_key))
+        except ShortURL.DoesNotExist:
+            if queryset.db == DEFAULT_DB_ALIAS:
+                return MISSING
+        # A replica may lag behind a create: confirm a miss on the primary
+        # before it is negatively cached
+        try:
+            return ResolvedKey(*queryset.using(DEFAULT_DB_ALIAS).get(short_key=short_key))
+        except ShortURL.DoesNotExist:
+            return MISSING
+
+    @classmethod
+    async def _alookup(cls, short_key: str) -> ResolvedKey:
+        queryset = cls._for_fill(cls._lookup_queryset(), [short_key])
+        try:
+            return ResolvedKey(*await queryset.aget(short_key=short_key))
+        except ShortURL.DoesNotExist:
+            if queryset.db == DEFAULT_DB_ALIAS:
+                return MISSING
+        try:
+            return ResolvedKey(*await queryset.using(DEFAULT_DB_ALIAS).aget(short_key=short_key))
         except ShortURL.DoesNotExist:
-            # Если даже неактивная или просроченная запись существует — возвращаем Gone
-            if ShortURL.objects.filter(short_key=short_key).exists():
-                raise GoneException("URL is inactive or expired")
+            return MISSING
+
+    @classmethod
+    def resolve(cls, short_key: str) -> ResolvedKey:
+        """
+        Resolve a short key through the redirect cache and the short key
+        filter, falling back to a single query that also covers inactive
+        and expired rows.
+        """
+        resolved = redirect_cache.get(short_key)
+        if resolved is not None:
+            return resolved
+        # Never issued: answer without a query and without caching the miss
+        if short_key_filter.enabled and not short_key_filter.might_contain(short_key):
+            return MISSING
+
+        resolved = cls._lookup(short_key)
+        redirect_cache.set(short_key, resolved)
+        return resolved
+
+    @classmethod
+    async def aresolve(cls, short_key: str) -> ResolvedKey:
+        """
+        Async variant of resolve() for the ASGI redirect view.
+        """
+        resolved = await redirect_cache.aget(short_key)
+        if resolved is not None:
+            return resolved
+        if short_key_filter.enabled and not await short_key_filter.amight_contain(short_key):
+            return MISSING
+
+        resolved = await cls._alookup(short_key)
+        await redirect_cache.aset(short_key, resolved)
+        return resolved
+
+    @classmethod
+    def resolve_many(cls, short_keys: list[str]) -> dict[str, ResolvedKey]:
+        """
+        resolve() for a batch of keys without recording clicks: cached keys
+        come from the redirect cache, the rest from a single query, and
+        are cached in turn.
+        """
+        short_keys = list(dict.fromkeys(short_keys))
+        resolved = redirect_cache.get_many(short_keys)
+        misses = []
+        for short_key in short_keys:
+            if short_key in resolved:
+                continue
+            if short_key_filter.enabled and not short_key_filter.might_contain(short_key):
+                resolved[short_key] = MISSING
+            else:
+                misses.append(short_key)
+
+        if misses:
+            found = cls._lookup_many(misses)
+            for short_key in misses:
+                resolved[short_key] = found.get(short_key, MISSING)
+                redirect_cache.set(short_key, resolved[short_key])
+        return resolved
+
+    @staticmethod
+    def _check(resolved: ResolvedKey) -> None:
+        if not resolved.exists:
             raise NotFound("URL does not exist")
+        # Запись найдена, но неактивна или просрочена — возвращаем Gone
+        if not resolved.is_live(timezone.now()):
+            raise GoneException("URL is inactive or expired")
+
+    @staticmethod
+    def max_age(resolved: ResolvedKey) -> int:
+        """
+        Seconds clients and CDNs may cache the redirect: the configured
+        SHORT_URLS_REDIRECT_MAX_AGE, but never past expires_at.
+        """
+        remaining = (resolved.expires_at - timezone.now()).total_seconds()
+        return max(0, min(settings.SHORT_URLS_REDIRECT_MAX_AGE, int(remaining)))
+
+    @classmethod
+    @timed('redirect')
+    def execute(cls, short_key: str) -> ResolvedKey:
+        resolved = cls.resolve(short_key)
+        cls._check(resolved)
 
         # Фиксируем клик
-        Click.objects.create(short_url=short_url)
-        return short_url.original_url
+        click_recorder.record(resolved.short_url_id)
+        return resolved
+
+    @classmethod
+    @timed('redirect')
+    async def aexecute(cls, short_key: str) -> ResolvedKey:
+        resolved = await cls.aresolve(short_key)
+        cls._check(resolved)
+
+        # Клик фиксируется без ожидания записи
+        click_recorder.arecord(resolved.short_url_id)
+        return resolved
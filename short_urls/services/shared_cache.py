@@ -0,0 +1,46 @@
+import logging
+from typing import Any, Callable, Optional
+
+from django.core.cache import BaseCache
+
+logger = logging.getLogger(__name__)
+
+
+def safe_cache_call(
+    cache: BaseCache,
+    method: str,
+    *args,
+    default: Any = None,
+    on_error: Optional[Callable[[], None]] = None,
+    **kwargs
+) -> Any:
+    """
+    Call `method` on a shared cache, returning `default` if the backend
+    fails. Everything kept in the shared cache can be rebuilt from the
+    database, so an outage must only cost speed, never a request.
+    """
+    try:
+        return getattr(cache, method)(*args, **kwargs)
+    except Exception:
+        if on_error is not None:
+            on_error()
+        logger.warning("Shared cache %s failed", method, exc_info=True)
+        return default
+
+
+async def asafe_cache_call(
+    cache: BaseCache,
+    method: str,
+    *args,
+    default: Any = None,
+    on_error: Optional[Callable[[], None]] = None,
+    **kwargs
+) -> Any:
+    """Async counterpart of safe_cache_call, for the a* cache methods."""
+    try:
+        return await getattr(cache, method)(*args, **kwargs)
+    except Exception:
+        if on_error is not None:
+            on_error()
+        logger.warning("Shared cache %s failed", method, exc_info=True)
+        return default
@@ -0,0 +1,311 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from ..constants import (
+    SHORT_KEY_FILTER_FALSE_POSITIVE_RATE,
+    SHORT_KEY_FILTER_MIN_CAPACITY,
+    SHORT_KEY_FILTER_HEADROOM,
+    SHORT_KEY_FILTER_BUILD_CHUNK_SIZE,
+    SHORT_KEY_FILTER_SYNC_SECONDS,
+    SHORT_KEY_FILTER_MAX_AGE_SECONDS,
+    SHORT_KEY_FILTER_MERGE_OVERLAP_SECONDS,
+    SHORT_KEY_FILTER_WRITE_THROUGH_SECONDS,
+    SHORT_URLS_CACHE_ALIAS,
+)
+from ..models import ShortURL
+from .redirect_cache import ResolvedKey, redirect_cache
+from .shared_cache import safe_cache_call
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings: no false negatives, false positives at
+    roughly the configured rate while the filter holds at most `capacity`
+    items.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = SHORT_KEY_FILTER_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.bits = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.bits
+
+    def add(self, item: str) -> None:
+        array = self._array
+        for position in self._positions(item):
+            array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        array = self._array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def fill_ratio(self) -> float:
+        return int.from_bytes(self._array, 'little').bit_count() / self.bits
+
+    def stats(self) -> dict:
+        fill_ratio = self.fill_ratio()
+        return {
+            'capacity': self.capacity,
+            'items': self.count,
+            'bits': self.bits,
+            'hashes': self.hashes,
+            'bytes': len(self._array),
+            'fill_ratio': round(fill_ratio, 6),
+            # Probability that a key that was never added passes the filter
+            'false_positive_rate': round(fill_ratio ** self.hashes, 6),
+        }
+
+    def dump(self) -> tuple:
+        return self.capacity, self.bits, self.hashes, self.count, bytes(self._array)
+
+    @classmethod
+    def load(cls, dumped: tuple) -> 'BloomFilter':
+        capacity, bits, hashes, count, array = dumped
+        bloom = cls.__new__(cls)
+        bloom.capacity, bloom.bits, bloom.hashes, bloom.count = capacity, bits, hashes, count
+        bloom._array = bytearray(array)
+        return bloom
+
+
+class ShortKeyFilter:
+    """
+    Per-process Bloom filter of every issued short key, so that redirects
+    for keys that were never issued (scanners, typos) answer 404 without a
+    query. Enabled by SHORT_URLS_KEY_FILTER.
+
+    The filter is built by streaming all keys from the primary and shared
+    through the cache: each process polls the shared copy and loads it when
+    it changes, and rebuilds it in a background thread when it is missing
+    or older than SHORT_KEY_FILTER_MAX_AGE_SECONDS. Until a filter is loaded
+    every key passes.
+
+    Keys created here are added to the local filter. Other processes merge
+    them on their next sync, which adds every key created since the filter
+    was built (less SHORT_KEY_FILTER_MERGE_OVERLAP_SECONDS) from the primary,
+    so a filter never hides a row for longer than a sync interval. Until
+    then the redirect path finds new keys in the shared redirect cache,
+    where creates write them through.
+    """
+
+    DATA_KEY = 'keyfilter:v1:data'
+    BUILT_AT_KEY = 'keyfilter:v1:built_at'
+    LOCK_KEY = 'keyfilter:v1:lock'
+
+    def __init__(
+        self,
+        sync_interval: float = SHORT_KEY_FILTER_SYNC_SECONDS,
+        max_age: float = SHORT_KEY_FILTER_MAX_AGE_SECONDS,
+        cache_alias: str = SHORT_URLS_CACHE_ALIAS,
+        autobuild: bool = True,
+    ):
+        self.sync_interval = sync_interval
+        self.max_age = max_age
+        self.cache_alias = cache_alias
+        self.autobuild = autobuild
+        self._filter: Optional[BloomFilter] = None
+        self._built_at = None
+        self._merged_until = None
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self._pending: Optional[list] = None
+        self._builder = None
+        self.definite_misses = 0
+        self.passed = 0
+        self.builds = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SHORT_URLS_KEY_FILTER
+
+    def _shared_call(self, method: str, *args, **kwargs):
+        return safe_cache_call(caches[self.cache_alias], method, *args, **kwargs)
+
+    def _due(self) -> bool:
+        return time.monotonic() >= self._next_sync
+
+    def sync(self) -> None:
+        """
+        Load the shared filter if it changed, merge the keys created since,
+        and start a rebuild if it is missing or too old. Runs at most once
+        per sync interval.
+        """
+        self._next_sync = time.monotonic() + self.sync_interval
+        built_at = self._shared_call('get', self.BUILT_AT_KEY)
+        if built_at is not None and built_at != self._built_at:
+            dumped = self._shared_call('get', self.DATA_KEY)
+            if dumped is not None:
+                self._install(BloomFilter.load(dumped), built_at)
+        if self._merged_until is not None:
+            self._merge_created()
+        if self.autobuild and (built_at is None or time.time() - built_at > self.max_age):
+            self._start_build()
+
+    def _install(self, bloom: BloomFilter, built_at: float) -> None:
+        with self._lock:
+            self._filter = bloom
+            self._built_at = built_at
+            self._merged_until = built_at
+
+    def _merge_created(self) -> None:
+        """Add the keys created since the last merge to the local filter."""
+        merged_until = time.time()
+        since = datetime.fromtimestamp(self._merged_until - SHORT_KEY_FILTER_MERGE_OVERLAP_SECONDS, timezone.utc)
+        # The primary, for the same reason as the rebuild
+        short_keys = list(
+            ShortURL.objects.using(DEFAULT_DB_ALIAS)
+            .filter(created_at__gte=since)
+            .values_list('short_key', flat=True)
+        )
+        with self._lock:
+            if self._filter is None:
+                return
+            for short_key in short_keys:
+                self._filter.add(short_key)
+            self._merged_until = max(self._merged_until, merged_until)
+
+    def _start_build(self) -> None:
+        if self._builder is not None and self._builder.is_alive():
+            return
+        # One process rebuilds, the others pick its result up on their next sync
+        if not self._shared_call('add', self.LOCK_KEY, True, timeout=int(self.max_age)):
+            return
+        self._builder = threading.Thread(target=self._build_in_background, name='short-key-filter', daemon=True)
+        self._builder.start()
+
+    def _build_in_background(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Short key filter rebuild failed")
+        finally:
+            self._shared_call('delete', self.LOCK_KEY)
+            connections[DEFAULT_DB_ALIAS].close()
+
+    def _stream_keys(self, chunk_size: int) -> Iterable[str]:
+        # The primary, so that keys just created are not missed to replica lag
+        return (
+            ShortURL.objects.using(DEFAULT_DB_ALIAS)
+            .values_list('short_key', flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+
+    def rebuild(self, chunk_size: int = SHORT_KEY_FILTER_BUILD_CHUNK_SIZE) -> dict:
+        """
+        Build a filter from all short keys, install it and share it.
+        Returns the new filter's stats.
+        """
+        built_at = time.time()
+        count = ShortURL.objects.using(DEFAULT_DB_ALIAS).count()
+        bloom = BloomFilter(max(SHORT_KEY_FILTER_MIN_CAPACITY, count * SHORT_KEY_FILTER_HEADROOM))
+        # Keys created while the scan runs may be missed by it
+        with self._lock:
+            self._pending = []
+        try:
+            for short_key in self._stream_keys(chunk_size):
+                bloom.add(short_key)
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+        for short_key in pending:
+            bloom.add(short_key)
+
+        self._install(bloom, built_at)
+        # The new filter is as fresh as a sync would make it
+        self._next_sync = time.monotonic() + self.sync_interval
+        timeout = int(self.max_age * 2)
+        self._shared_call('set', self.DATA_KEY, bloom.dump(), timeout=timeout)
+        self._shared_call('set', self.BUILT_AT_KEY, built_at, timeout=timeout)
+        self.builds += 1
+        return bloom.stats()
+
+    def add(self, short_key: str) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(short_key)
+            if self._pending is not None:
+                self._pending.append(short_key)
+
+    def _check(self, short_key: str) -> bool:
+        bloom = self._filter
+        if bloom is None or short_key in bloom:
+            self.passed += 1
+            return True
+        self.definite_misses += 1
+        return False
+
+    def might_contain(self, short_key: str) -> bool:
+        """
+        False only if the key was definitely never issued.
+        """
+        if self._due():
+            self.sync()
+        return self._check(short_key)
+
+    async def amight_contain(self, short_key: str) -> bool:
+        if self._due():
+            await sync_to_async(self.sync)()
+        return self._check(short_key)
+
+    def created(self, short_url: ShortURL) -> None:
+        """
+        Register a new link: add it to the local filter and, once the
+        transaction commits, write its resolution through to the shared
+        redirect cache for the processes whose filter does not have it yet.
+        """
+        if not self.enabled:
+            return
+        self.add(short_url.short_key)
+        resolved = ResolvedKey(
+            short_url.id, short_url.original_url, short_url.expires_at, short_url.is_active, short_url.redirect_status
+        )
+        transaction.on_commit(
+            lambda: redirect_cache.set(short_url.short_key, resolved, ttl=SHORT_KEY_FILTER_WRITE_THROUGH_SECONDS)
+        )
+
+    def clear(self) -> None:
+        """Drop the local and shared filter (used by tests and maintenance)."""
+        with self._lock:
+            self._filter = None
+            self._built_at = None
+            self._merged_until = None
+        self._next_sync = 0.0
+        self._shared_call('delete_many', [self.DATA_KEY, self.BUILT_AT_KEY, self.LOCK_KEY])
+
+    def stats(self) -> dict:
+        bloom = self._filter
+        values = {
+            'loaded': bloom is not None,
+            'age_seconds': round(time.time() - self._built_at, 1) if self._built_at else None,
+            'definite_misses': self.definite_misses,
+            'passed': self.passed,
+            'builds': self.builds,
+        }
+        if bloom is not None:
+            values.update(bloom.stats())
+        return values
+
+
+short_key_filter = ShortKeyFilter()
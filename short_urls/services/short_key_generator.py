@@ -1,19 +1,295 @@
+import hashlib
 import secrets
+import threading
+from collections import deque
+
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from ..models import ShortURL
-from ..constants import SHORT_KEY_ALPHABET, SHORT_KEY_LENGTH, MAX_SHORT_KEY_GENERATION_ATTEMPTS
+from django.db import transaction
+from django.db.models import F
 
-class ShortKeyGenerator:
+from ..models import ShortURL, KeySequence, PooledShortKey
+from ..instrumentation import timed
+from ..constants import (
+    SHORT_KEY_ALPHABET,
+    SHORT_KEY_LENGTH,
+    MAX_SHORT_KEY_GENERATION_ATTEMPTS,
+    SHORT_KEY_SEQUENCE_BLOCK_SIZE,
+    SHORT_KEY_PERMUTATION_ROUNDS,
+    KEY_POOL_CLAIM_BATCH_SIZE,
+    KEY_POOL_TARGET_SIZE,
+    KEY_POOL_LOW_WATERMARK,
+    KEY_POOL_REFILL_CHUNK_SIZE,
+)
+
+
+class CheckedRandomKeyStrategy:
     """
-    Генератор уникального короткого ключа.
+    Random keys checked against the table before use (one query per attempt).
     """
+    name = 'checked'
 
     @staticmethod
-    def generate() -> str:
+    def random_key() -> str:
+        return ''.join(secrets.choice(SHORT_KEY_ALPHABET) for _ in range(SHORT_KEY_LENGTH))
+
+    def generate(self) -> str:
         for _ in range(MAX_SHORT_KEY_GENERATION_ATTEMPTS):
-            key = ''.join(secrets.choice(SHORT_KEY_ALPHABET) for _ in range(SHORT_KEY_LENGTH))
+            key = self.random_key()
             try:
                 ShortURL.objects.get(short_key=key)
             except ObjectDoesNotExist:
                 return key
-        raise RuntimeError("Failed to generate unique key after multiple attempts")
\ No newline at end of file
+        raise RuntimeError("Failed to generate unique key after multiple attempts")
+
+    def generate_many(self, count: int, exclude: set = frozenset()) -> list[str]:
+        keys = set()
+        for _ in range(MAX_SHORT_KEY_GENERATION_ATTEMPTS):
+            missing = count - len(keys)
+            if missing <= 0:
+                return list(keys)
+            candidates = {self.random_key() for _ in range(missing)} - keys - exclude
+            taken = set(
+                ShortURL.objects.filter(short_key__in=candidates).values_list('short_key', flat=True)
+            )
+            keys |= candidates - taken
+        if len(keys) >= count:
+            return list(keys)
+        raise RuntimeError("Failed to generate unique keys after multiple attempts")
+
+
+class RandomKeyStrategy(CheckedRandomKeyStrategy):
+    """
+    Random keys without a pre-check: 62^12 keys make collisions rare enough
+    to leave them to the unique constraint and an insert-and-retry.
+    """
+    name = 'random'
+
+    def generate(self) -> str:
+        return self.random_key()
+
+    def generate_many(self, count: int, exclude: set = frozenset()) -> list[str]:
+        keys = set()
+        while len(keys) < count:
+            key = self.random_key()
+            if key not in exclude:
+                keys.add(key)
+        return list(keys)
+
+
+class SequenceKeyStrategy:
+    """
+    Keys derived from a database sequence allocated in blocks. Each number is
+    mapped through a keyed Feistel permutation of [0, 62^12) and written in
+    base 62, so keys look random but never repeat. Only custom keys of the
+    same length can collide, which the insert-and-retry covers.
+    """
+    name = 'sequence'
+    sequence_name = 'short_key'
+
+    BASE = len(SHORT_KEY_ALPHABET)
+    DOMAIN = BASE ** SHORT_KEY_LENGTH
+    HALF_BITS = ((DOMAIN - 1).bit_length() + 1) // 2
+    HALF_MASK = (1 << HALF_BITS) - 1
+
+    def __init__(self, block_size: int = SHORT_KEY_SEQUENCE_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _allocate_block(self) -> None:
+        with transaction.atomic():
+            KeySequence.objects.get_or_create(name=self.sequence_name)
+            KeySequence.objects.filter(name=self.sequence_name).update(
+                next_value=F('next_value') + self.block_size
+            )
+            end = KeySequence.objects.values_list('next_value', flat=True).get(name=self.sequence_name)
+        self._next, self._end = end - self.block_size, end
+
+    def next_number(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._allocate_block()
+            number = self._next
+            self._next += 1
+            return number
+
+    def _round(self, value: int, round_index: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(8, 'big'),
+            digest_size=8,
+            key=settings.SHORT_KEY_PERMUTATION_KEY.encode()[:64],
+            salt=round_index.to_bytes(16, 'big'),
+        ).digest()
+        return int.from_bytes(digest, 'big') & self.HALF_MASK
+
+    def permute(self, number: int) -> int:
+        # Feistel rounds permute the 2 * HALF_BITS domain; cycle-walking
+        # keeps the result inside [0, DOMAIN)
+        value = number
+        while True:
+            left, right = value >> self.HALF_BITS, value & self.HALF_MASK
+            for round_index in range(SHORT_KEY_PERMUTATION_ROUNDS):
+                left, right = right, left ^ self._round(right, round_index)
+            value = (left << self.HALF_BITS) | right
+            if value < self.DOMAIN:
+                return value
+
+    def encode(self, value: int) -> str:
+        chars = []
+        for _ in range(SHORT_KEY_LENGTH):
+            value, remainder = divmod(value, self.BASE)
+            chars.append(SHORT_KEY_ALPHABET[remainder])
+        return ''.join(reversed(chars))
+
+    def generate(self) -> str:
+        return self.encode(self.permute(self.next_number() % self.DOMAIN))
+
+    def generate_many(self, count: int, exclude: set = frozenset()) -> list[str]:
+        keys = []
+        while len(keys) < count:
+            key = self.generate()
+            if key not in exclude:
+                keys.append(key)
+        return keys
+
+
+class KeyPoolStrategy:
+    """
+    Keys claimed from a table of pre-generated ones. Each process claims a
+    batch at a time (SELECT ... FOR UPDATE SKIP LOCKED + DELETE where the
+    database supports it), so a create takes a key from memory. An empty
+    pool falls back to random keys instead of failing.
+    """
+    name = 'pool'
+
+    def __init__(
+        self,
+        claim_batch_size: int = KEY_POOL_CLAIM_BATCH_SIZE,
+        low_watermark: int = KEY_POOL_LOW_WATERMARK,
+    ):
+        self.claim_batch_size = claim_batch_size
+        self.low_watermark = low_watermark
+        self._lock = threading.Lock()
+        self._buffer = deque()
+        self.claimed = 0
+        self.claim_batches = 0
+        self.fallbacks = 0
+        self.refilled = 0
+
+    def _claim_batch(self, size: int) -> list[str]:
+        with transaction.atomic():
+            rows = list(
+                PooledShortKey.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'short_key')[:size]
+            )
+            if rows:
+                PooledShortKey.objects.filter(id__in=[pk for pk, _ in rows]).delete()
+        self.claim_batches += 1
+        return [short_key for _, short_key in rows]
+
+    def generate(self) -> str:
+        return self.generate_many(1)[0]
+
+    def generate_many(self, count: int, exclude: set = frozenset()) -> list[str]:
+        keys = []
+        with self._lock:
+            while len(keys) < count:
+                if not self._buffer:
+                    batch = self._claim_batch(max(self.claim_batch_size, count - len(keys)))
+                    if not batch:
+                        break
+                    self._buffer.extend(batch)
+                key = self._buffer.popleft()
+                if key not in exclude:
+                    keys.append(key)
+        self.claimed += len(keys)
+
+        missing = count - len(keys)
+        if missing:
+            self.fallbacks += missing
+            keys.extend(KEY_STRATEGIES['random'].generate_many(missing, exclude | set(keys)))
+        return keys
+
+    def available(self) -> int:
+        return PooledShortKey.objects.count()
+
+    def refill(
+        self,
+        target: int = KEY_POOL_TARGET_SIZE,
+        source: str = None,
+        chunk_size: int = KEY_POOL_REFILL_CHUNK_SIZE,
+    ) -> int:
+        """
+        Top the pool up to `target` keys. Returns the number of keys added.
+        """
+        strategy = KEY_STRATEGIES[source or settings.SHORT_KEY_POOL_SOURCE]
+        before = available = self.available()
+        while available < target:
+            candidates = set(strategy.generate_many(min(chunk_size, target - available)))
+            taken = set(
+                ShortURL.objects.filter(short_key__in=candidates).values_list('short_key', flat=True)
+            )
+            PooledShortKey.objects.bulk_create(
+                [PooledShortKey(short_key=key) for key in candidates - taken],
+                ignore_conflicts=True
+            )
+            available = self.available()
+        added = available - before
+        self.refilled += max(added, 0)
+        return max(added, 0)
+
+    def stats(self) -> dict:
+        available = self.available()
+        return {
+            'available': available,
+            'low_watermark': self.low_watermark,
+            'below_low_watermark': available < self.low_watermark,
+            'local_buffer': len(self._buffer),
+            'claimed': self.claimed,
+            'claim_batches': self.claim_batches,
+            'fallbacks': self.fallbacks,
+            'refilled': self.refilled,
+        }
+
+
+KEY_STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        CheckedRandomKeyStrategy(),
+        RandomKeyStrategy(),
+        SequenceKeyStrategy(),
+        KeyPoolStrategy(),
+    )
+}
+
+
+class ShortKeyGenerator:
+    """
+    Генератор уникального короткого ключа.
+
+    Стратегия выбирается настройкой SHORT_KEY_STRATEGY.
+    """
+
+    @staticmethod
+    def strategy(name: str = None):
+        name = name or settings.SHORT_KEY_STRATEGY
+        try:
+            return KEY_STRATEGIES[name]
+        except KeyError:
+            raise RuntimeError(f"Unknown short key strategy: {name}")
+
+    @classmethod
+    @timed('keygen')
+    def generate(cls) -> str:
+        return cls.strategy().generate()
+
+    @classmethod
+    @timed('keygen')
+    def generate_many(cls, count: int, exclude: set = frozenset()) -> list[str]:
+        """
+        Generate `count` distinct keys not in `exclude`.
+        """
+        return cls.strategy().generate_many(count, exclude)
@@ -0,0 +1,102 @@
+import hashlib
+from datetime import datetime
+from typing import Callable, Optional
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import StatsLeaderboardEntry
+from ..constants import (
+    LEADERBOARD_SIZE,
+    LEADERBOARD_CACHE_TTL_SECONDS,
+    LEADERBOARD_MAX_AGE_SECONDS,
+    SHORT_URLS_CACHE_ALIAS,
+)
+from .agregate_stats import ShortURLStatsService
+from .shared_cache import safe_cache_call
+
+
+class StatsLeaderboardService:
+    """
+    Service for the precomputed stats leaderboard.
+
+    refresh() snapshots the top links with their windowed counters into
+    StatsLeaderboardEntry. Pages read from the snapshot are cached in the
+    shared cache for a few seconds under the snapshot's timestamp, so a
+    refresh makes every cached page obsolete at once.
+    """
+
+    REFRESHED_AT_KEY = 'leaderboard:v1:refreshed_at'
+    PAGE_KEY = 'leaderboard:v1:{}:{}'
+
+    @staticmethod
+    def _cache_call(method: str, *args, **kwargs):
+        return safe_cache_call(caches[SHORT_URLS_CACHE_ALIAS], method, *args, **kwargs)
+
+    @classmethod
+    def refresh(cls, top: int = LEADERBOARD_SIZE) -> int:
+        """
+        Rebuild the leaderboard from the live stats. Returns the number of rows.
+        """
+        refreshed_at = timezone.now()
+        entries = [
+            StatsLeaderboardEntry(
+                rank=rank,
+                short_url_id=obj.id,
+                short_key=obj.short_key,
+                original_url=obj.original_url,
+                last_hour_clicks=obj.last_hour_clicks,
+                last_day_clicks=obj.last_day_clicks,
+                all_time_clicks=obj.all_time_clicks,
+                refreshed_at=refreshed_at,
+            )
+            for rank, obj in enumerate(ShortURLStatsService.stats_queryset()[:top], start=1)
+        ]
+        with transaction.atomic():
+            StatsLeaderboardEntry.objects.all().delete()
+            StatsLeaderboardEntry.objects.bulk_create(entries)
+        transaction.on_commit(
+            lambda: cls._cache_call('set', cls.REFRESHED_AT_KEY, refreshed_at, LEADERBOARD_MAX_AGE_SECONDS)
+        )
+        return len(entries)
+
+    @classmethod
+    def snapshot_at(cls) -> Optional[datetime]:
+        """
+        Timestamp of the current snapshot whatever its age, or None when
+        there is no snapshot.
+        """
+        refreshed_at = cls._cache_call('get', cls.REFRESHED_AT_KEY)
+        if refreshed_at is None:
+            refreshed_at = StatsLeaderboardEntry.objects.aggregate(latest=Max('refreshed_at'))['latest']
+            # Cache "no snapshot" as well, briefly, so polling stays off the database
+            cls._cache_call('set', cls.REFRESHED_AT_KEY, refreshed_at or '', LEADERBOARD_CACHE_TTL_SECONDS)
+        return refreshed_at or None
+
+    @classmethod
+    def refreshed_at(cls) -> Optional[datetime]:
+        """
+        Timestamp of the current snapshot, or None when there is no snapshot
+        or it is too old to serve.
+        """
+        refreshed_at = cls.snapshot_at()
+        if refreshed_at is None:
+            return None
+        if (timezone.now() - refreshed_at).total_seconds() > LEADERBOARD_MAX_AGE_SECONDS:
+            return None
+        return refreshed_at
+
+    @classmethod
+    def cached_page(cls, refreshed_at: datetime, params: str, build: Callable[[], dict]) -> dict:
+        """
+        Return the page payload for `params` (the request's query string)
+        from the cache, building and caching it on a miss.
+        """
+        key = cls.PAGE_KEY.format(refreshed_at.timestamp(), hashlib.md5(params.encode()).hexdigest())
+        payload = cls._cache_call('get', key)
+        if payload is None:
+            payload = build()
+            cls._cache_call('set', key, payload, LEADERBOARD_CACHE_TTL_SECONDS)
+        return payload
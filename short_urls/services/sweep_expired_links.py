@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ShortURL
+from ..constants import EXPIRY_SWEEP_BATCH_SIZE
+from .redirect_cache import redirect_cache
+
+
+class SweepExpiredLinksService:
+    """
+    Service for deactivating expired short URLs in batches.
+
+    Keeps expired rows out of the partial live-link indexes and drops their
+    redirect cache entries. Other processes need no broadcast: cached entries
+    carry expires_at and already answer 410 once it passes.
+    """
+
+    @staticmethod
+    def sweep_batch(batch_size: int = EXPIRY_SWEEP_BATCH_SIZE) -> int:
+        with transaction.atomic():
+            rows = list(
+                ShortURL.objects.pending_expiry()
+                .order_by('expires_at')
+                .values_list('id', 'short_key')[:batch_size]
+            )
+            if not rows:
+                return 0
+            deactivated = ShortURL.objects.filter(
+                id__in=[pk for pk, _ in rows], is_active=True
+            ).update(is_active=False, updated_at=timezone.now())
+
+        for _, short_key in rows:
+            redirect_cache.invalidate(short_key, broadcast=False)
+        return deactivated
+
+    @classmethod
+    def execute(cls, batch_size: int = EXPIRY_SWEEP_BATCH_SIZE) -> int:
+        """
+        Deactivate every link that has expired so far. Returns the number of
+        links deactivated.
+        """
+        total = 0
+        while True:
+            deactivated = cls.sweep_batch(batch_size)
+            if not deactivated:
+                return total
+            total += deactivated
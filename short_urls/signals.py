@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ShortURL
+from .services.redirect_cache import redirect_cache
+from .services.short_key_filter import short_key_filter
+
+
+@receiver(post_save, sender=ShortURL)
+@receiver(post_delete, sender=ShortURL)
+def invalidate_redirect_cache(sender, instance, created=False, **kwargs):
+    """Drop the cached resolution now and once more after commit."""
+    short_key = instance.short_key
+    broadcast = not created
+    redirect_cache.invalidate(short_key, broadcast=False)
+    transaction.on_commit(lambda: redirect_cache.invalidate(short_key, broadcast=broadcast))
+    if created:
+        short_key_filter.created(instance)
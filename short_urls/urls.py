@@ -2,15 +2,21 @@ from django.urls import path
 
 from .views import ( 
     DeactivateShortURLView,
+    ShortURLBulkCreateView,
     ShortURLListCreateView,
+    ShortURLResolveBatchView,
     ShortURLRetrieveView,
+    ShortURLStatsBatchView,
     ShortURLStatsDetailView,
     ShortURLStatsView
 )
 
 urlpatterns = [
     path('short-urls/', ShortURLListCreateView.as_view(), name='create-list'),
+    path('short-urls/bulk/', ShortURLBulkCreateView.as_view(), name='bulk-create'),
     path('short-urls/stats/', ShortURLStatsView.as_view(), name='stats'),
+    path('short-urls/stats/batch/', ShortURLStatsBatchView.as_view(), name='batch-stats'),
+    path('short-urls/resolve/', ShortURLResolveBatchView.as_view(), name='batch-resolve'),
     path('short-urls/<str:short_key>/', ShortURLRetrieveView.as_view(), name='detail'),
     path('short-urls/<str:short_key>/deactivate', DeactivateShortURLView.as_view(), name='deactivate'),
     path('short-urls/stats/<str:short_key>/', ShortURLStatsDetailView.as_view(), name='detail-stats'),
@@ -1,8 +1,23 @@
-from django.http import HttpResponseGone, HttpResponseNotFound, HttpResponseRedirect
+import csv
+import hashlib
+import json
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.http import HttpResponse, HttpResponseGone, HttpResponseNotFound, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views import View
 from distutils.util import strtobool
 
 from rest_framework import generics, status
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -10,25 +25,49 @@ from rest_framework.exceptions import NotFound, ValidationError as DRFValidation
 
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 
-from .models import ShortURL
+from .models import ShortURL, StatsLeaderboardEntry
 from .serializers import (
+    BatchResolveResponseSerializer,
+    BatchShortKeysSerializer,
+    BatchStatsResponseSerializer,
+    BulkCreateResponseSerializer,
+    BulkCreateShortURLItemSerializer,
     CreateShortURLSerializer,
     ShortURLSerializer,
     ShortURLStatsSerializer,
     DeactivateResponseSerializer
 )
-from .pagination import CustomPagination
+from .pagination import LeaderboardPagination, ShortURLPagination, StatsPagination
+from .parsers import NDJSONParser
+from .authentication import APIKeyAuthentication
+from .constants import BULK_CREATE_MAX_ITEMS, IDEMPOTENCY_KEY_MAX_LENGTH, STATS_EXPORT_FORMATS
 
 from .services.create_short_url import CreateShortURLService
+from .services.idempotent_create import IdempotencyKeyReused, IdempotentCreateService, IdempotentResult
+from .services.bulk_create_short_urls import BulkCreateShortURLService
 from .services.deactivate_short_url import DeactivateShortURLService
 from .services.redirect_short_url import RedirectShortURLService, GoneException
 from .services.agregate_stats import ShortURLStatsService
+from .services.stats_leaderboard import StatsLeaderboardService
+from .services.click_recorder import click_recorder
+from .services.redirect_cache import ResolvedKey, redirect_cache
+from .services.short_key_generator import KEY_STRATEGIES
+from .services.short_key_filter import short_key_filter
+from .instrumentation import db_pool_stats, metrics, span
+from .routers import pin_if_user_wrote
 
 
 class BaseAuthView(APIView):
-    authentication_classes = [BasicAuthentication]
+    # API keys are cheap to verify; Basic auth runs the password hasher
+    authentication_classes = [APIKeyAuthentication, BasicAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Read-your-writes across requests for API clients without cookies
+        if settings.SHORT_URLS_DB_REPLICAS and request.user.is_authenticated:
+            pin_if_user_wrote(request.user.pk)
+
 
 @extend_schema_view(
     get=extend_schema(
@@ -39,15 +78,28 @@ class BaseAuthView(APIView):
                 location=OpenApiParameter.QUERY,
             )
         ]
+    ),
+    post=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='Idempotency-Key',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description="Retries with the same key return the first response",
+            )
+        ],
+        responses={201: ShortURLSerializer, 200: ShortURLSerializer},
     )
 )
 class ShortURLListCreateView(BaseAuthView, generics.ListCreateAPIView):
     """
-    GET /short-urls/ - get a list (with pagination) of all short links.
-    POST /short-urls/ - create a new short link.
+    GET /short-urls/ - get a list (with keyset pagination, newest first) of all short links.
+    POST /short-urls/ - create a new short link. With reuse_existing an
+        existing live link to the same URL is returned (200) instead; an
+        Idempotency-Key header makes retries return the first result.
     """
     queryset = ShortURL.objects.all()
-    pagination_class = CustomPagination
+    pagination_class = ShortURLPagination
 
     def get_serializer_class(self):
         return CreateShortURLSerializer if self.request.method == 'POST' else ShortURLSerializer
@@ -67,35 +119,188 @@ class ShortURLListCreateView(BaseAuthView, generics.ListCreateAPIView):
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        with span('validate'):
+            serializer.is_valid(raise_exception=True)
 
-        original_url = serializer.validated_data['original_url']
-        custom_key = serializer.validated_data.get('custom_key')
-        expires_days = serializer.validated_data.get('expires_days')
+        params = {
+            'original_url': serializer.validated_data['original_url'],
+            'custom_key': serializer.validated_data.get('custom_key'),
+            'expires_days': serializer.validated_data.get('expires_days'),
+            'redirect_status': serializer.validated_data.get('redirect_status'),
+            'reuse_existing': serializer.validated_data.get(
+                'reuse_existing', settings.SHORT_URLS_CREATE_REUSE_EXISTING
+            ),
+        }
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise DRFValidationError(
+                {'Idempotency-Key': [f"Must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters long"]}
+            )
 
         try:
-            short_url_obj = CreateShortURLService.execute(
-                original_url=original_url,
-                custom_key=custom_key,
-                expires_days=expires_days
-            )
-        except (ValueError, DRFValidationError) as e:
+            if idempotency_key:
+                result = IdempotentCreateService.execute(
+                    request.user,
+                    idempotency_key,
+                    params,
+                    lambda: CreateShortURLService.get_or_create(**params)
+                )
+            else:
+                result = IdempotentResult(*CreateShortURLService.get_or_create(**params), replayed=False)
+        except (DRFValidationError, IdempotencyKeyReused):
+            raise
+        except ValueError as e:
             raise DRFValidationError(str(e))
         except Exception as e:
             raise DRFValidationError(str(e))
 
-        output_serializer = ShortURLSerializer(short_url_obj, context=self.get_serializer_context())
-        return Response(output_serializer.data, status=status.HTTP_201_CREATED)
+        output_serializer = ShortURLSerializer(result.short_url, context=self.get_serializer_context())
+        with span('serialize'):
+            data = output_serializer.data
+        headers = {'Idempotent-Replayed': 'true'} if result.replayed else None
+        return Response(
+            data,
+            status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK,
+            headers=headers
+        )
+
+
+class ShortURLBulkCreateView(BaseAuthView):
+    """
+    POST /short-urls/bulk/ - create many short links from a JSON array or an
+        NDJSON stream. Returns a result per item in request order;
+        201 if every item was created, 207 if some failed.
+    """
+    parser_classes = [JSONParser, NDJSONParser]
+    max_items = BULK_CREATE_MAX_ITEMS
+
+    @extend_schema(
+        request=BulkCreateShortURLItemSerializer(many=True),
+        responses={201: BulkCreateResponseSerializer, 207: BulkCreateResponseSerializer},
+        operation_id="shorturl_bulk_create"
+    )
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise DRFValidationError("Expected a list of items")
+        if len(items) > self.max_items:
+            raise DRFValidationError(f"At most {self.max_items} items per request")
+
+        results = [None] * len(items)
+        valid_indexes = []
+        valid_items = []
+        for index, item in enumerate(items):
+            serializer = BulkCreateShortURLItemSerializer(data=item)
+            if serializer.is_valid():
+                valid_indexes.append(index)
+                valid_items.append(serializer.validated_data)
+            else:
+                results[index] = serializer.errors
+
+        created = BulkCreateShortURLService.execute(valid_items)
+        for index, result in zip(valid_indexes, created):
+            results[index] = result
+
+        context = {'request': request}
+        payload = []
+        for index, result in enumerate(results):
+            if isinstance(result, ShortURL):
+                payload.append({
+                    'index': index,
+                    'status': 'created',
+                    'data': ShortURLSerializer(result, context=context).data
+                })
+            else:
+                payload.append({'index': index, 'status': 'error', 'errors': result})
+
+        created_count = sum(1 for item in payload if item['status'] == 'created')
+        return Response(
+            {'created': created_count, 'failed': len(payload) - created_count, 'results': payload},
+            status=status.HTTP_201_CREATED if created_count == len(payload) else status.HTTP_207_MULTI_STATUS
+        )
 
 
 class ShortURLRetrieveView(BaseAuthView, generics.RetrieveAPIView):
     """
     GET /short-urls/{short_key}/ - return information about a specific short link.
+        Supports conditional GETs keyed off the link's updated_at.
     """
     queryset = ShortURL.objects.all()
     serializer_class = ShortURLSerializer
     lookup_field = 'short_key'
 
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = etag_for(instance.pk, instance.updated_at.isoformat())
+        response = not_modified(request, etag, instance.updated_at)
+        if response is not None:
+            return response
+        return set_validators(Response(self.get_serializer(instance).data), etag, instance.updated_at)
+
+
+def _redirect(resolved: ResolvedKey) -> HttpResponseRedirect:
+    response = HttpResponseRedirect(resolved.original_url)
+    response.status_code = resolved.redirect_status
+    max_age = RedirectShortURLService.max_age(resolved)
+    if max_age:
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        # Without it browsers keep a 301/308 forever
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def redirect_response(short_key):
+    """Build the 30x/404/410 response for a short key."""
+    try:
+        resolved = RedirectShortURLService.execute(short_key)
+    except GoneException as e:
+        return HttpResponseGone(str(e))
+    except NotFound as e:
+        return HttpResponseNotFound(str(e))
+
+    return _redirect(resolved)
+
+
+async def aredirect_response(short_key):
+    """Async variant of redirect_response()."""
+    try:
+        resolved = await RedirectShortURLService.aexecute(short_key)
+    except GoneException as e:
+        return HttpResponseGone(str(e))
+    except NotFound as e:
+        return HttpResponseNotFound(str(e))
+
+    return _redirect(resolved)
+
+
+def etag_for(*parts) -> str:
+    return '"%s"' % hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def set_validators(response, etag: str, last_modified: datetime = None):
+    """Add the ETag/Last-Modified of a read response; clients must revalidate."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag: str, last_modified: datetime = None):
+    """
+    304 response when the request's If-None-Match/If-Modified-Since match,
+    else None. Checked before serializing, so a 304 skips that work.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
 
 class RedirectView(APIView):
     """
@@ -109,14 +314,19 @@ class RedirectView(APIView):
 
     @extend_schema(exclude=True)
     def get(self, request, short_key):
-        try:
-            original_url = RedirectShortURLService.execute(short_key)
-        except GoneException as e:
-            return HttpResponseGone(str(e))
-        except NotFound as e:
-            return HttpResponseNotFound(str(e))
+        return redirect_response(short_key)
+
+
+class AsyncRedirectView(View):
+    """
+    GET /{short_key}/ - native async variant of RedirectView for ASGI
+        deployments. Plain Django view: no DRF request parsing,
+        authentication or content negotiation.
+    """
+    http_method_names = ['get', 'head']
 
-        return HttpResponseRedirect(original_url)
+    async def get(self, request, short_key):
+        return await aredirect_response(short_key)
 
 
 class DeactivateShortURLView(BaseAuthView):
@@ -141,21 +351,127 @@ class DeactivateShortURLView(BaseAuthView):
         return Response({"status": "deactivated"}, status=status.HTTP_200_OK)
 
 
-class ShortURLStatsView(BaseAuthView):
+class _Echo:
+    """File-like object for csv.writer that returns the written line."""
+
+    def write(self, value):
+        return value
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def _csv_lines(rows, fieldnames):
+    writer = csv.DictWriter(_Echo(), fieldnames=fieldnames)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        operation_id="shorturl_stats_list",
+        parameters=[
+            OpenApiParameter(
+                name='export',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=STATS_EXPORT_FORMATS,
+                description='Stream all rows as NDJSON or CSV instead of a page',
+            ),
+            OpenApiParameter(
+                name='live',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Compute the page live instead of reading the precomputed leaderboard',
+            ),
+        ]
+    )
+)
+class ShortURLStatsView(BaseAuthView, generics.ListAPIView):
     """
-    GET /short-urls/stats/ - get statistics for all short links.
+    GET /short-urls/stats/ - get statistics for all short links, ordered by
+        all-time clicks (keyset pagination).
+    GET /short-urls/stats/?export=ndjson|csv - stream statistics for all links.
+
+    While a fresh leaderboard snapshot exists (refresh_stats_leaderboard),
+    pages come from it and from a short-lived cache; it covers the top
+    LEADERBOARD_SIZE links, and the links ranked below it follow as live
+    pages. ?live=true computes the pages from the live data. Either way
+    refreshed_at tells how fresh the numbers are.
+
+    Both modes share the cursor position (total clicks, id); the cursor
+    also records the snapshot it was issued from, so an iteration keeps
+    its mode until it ends.
     """
     serializer_class = ShortURLStatsSerializer
-    pagination_class = CustomPagination
+    pagination_class = StatsPagination
 
-    @extend_schema(
-        responses={200: ShortURLStatsSerializer(many=True)},
-        operation_id="shorturl_stats_list"
-    )
-    def get(self, request, *args, **kwargs):
-        data = ShortURLStatsService.list_all_stats()
-        serializer = ShortURLStatsSerializer(data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def get_queryset(self):
+        return ShortURLStatsService.stats_queryset()
+
+    def snapshot_for(self, request) -> Optional[datetime]:
+        """
+        Timestamp of the leaderboard snapshot to page over, or None for
+        live pages.
+        """
+        cursor = self.paginator.cursor_payload(request)
+        if cursor is None:
+            if request.query_params.get('live', '').lower() in ('1', 'true', 'yes', 'on'):
+                return None
+            return StatsLeaderboardService.refreshed_at()
+        if cursor.get('snapshot') is None:
+            return None
+        snapshot = parse_datetime(str(cursor['snapshot']))
+        if snapshot is None:
+            raise NotFound(self.paginator.invalid_cursor_message)
+        current = StatsLeaderboardService.snapshot_at()
+        # Finish on the snapshot the iteration started on, even once it is
+        # stale; after a refresh carry on from the same position in the new
+        # one, or live when that is too old as well
+        if current == snapshot:
+            return current
+        return StatsLeaderboardService.refreshed_at()
+
+    def list(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export')
+        if export_format is None:
+            with span('stats'):
+                refreshed_at = self.snapshot_for(request)
+                if refreshed_at is not None:
+                    return self.leaderboard_list(request, refreshed_at)
+                response = super().list(request, *args, **kwargs)
+                response.data['refreshed_at'] = timezone.now()
+                return response
+        if export_format not in STATS_EXPORT_FORMATS:
+            raise DRFValidationError({'export': f"Supported formats: {', '.join(STATS_EXPORT_FORMATS)}"})
+
+        rows = ShortURLStatsService.iter_stats()
+        if export_format == 'csv':
+            fieldnames = ShortURLStatsSerializer.Meta.fields
+            response = StreamingHttpResponse(_csv_lines(rows, fieldnames), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="short-url-stats.csv"'
+            return response
+        return StreamingHttpResponse(_ndjson_lines(rows), content_type='application/x-ndjson')
+
+    def leaderboard_list(self, request, refreshed_at):
+        def build():
+            paginator = LeaderboardPagination()
+            paginator.cursor_state = {'snapshot': refreshed_at.isoformat()}
+            page = paginator.paginate_queryset(StatsLeaderboardEntry.objects.all(), request, self)
+            data = list(self.get_serializer(page, many=True).data)
+            return {**paginator.get_paginated_response(data).data, 'refreshed_at': refreshed_at}
+
+        params = request.META.get('QUERY_STRING', '')
+        # The snapshot only changes on refresh: its timestamp versions every page
+        etag = etag_for('leaderboard', refreshed_at.isoformat(), params)
+        response = not_modified(request, etag, refreshed_at)
+        if response is not None:
+            return response
+        payload = StatsLeaderboardService.cached_page(refreshed_at, params, build)
+        return set_validators(Response(payload), etag, refreshed_at)
 
 
 class ShortURLStatsDetailView(BaseAuthView):
@@ -169,9 +485,125 @@ class ShortURLStatsDetailView(BaseAuthView):
         operation_id="shorturl_stats_retrieve"
     )
     def get(self, request, short_key, *args, **kwargs):
-        try:
-            data = ShortURLStatsService.detail_stats(short_key)
-        except NotFound as e:
-            raise e
+        # Checked before the windowed counters are computed, so a 304 skips them
+        etag = etag_for(*ShortURLStatsService.detail_version(short_key))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = ShortURLStatsService.detail_stats(short_key)
         serializer = ShortURLStatsSerializer(data)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return set_validators(Response(serializer.data, status=status.HTTP_200_OK), etag)
+
+
+class ShortURLStatsBatchView(BaseAuthView):
+    """
+    POST /short-urls/stats/batch/ - statistics for up to BATCH_LOOKUP_MAX_KEYS
+        short keys from one query. Returns a result per key in request order.
+    """
+
+    @extend_schema(
+        request=BatchShortKeysSerializer,
+        responses={200: BatchStatsResponseSerializer},
+        operation_id="shorturl_stats_batch"
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = BatchShortKeysSerializer(data=request.data)
+        with span('validate'):
+            serializer.is_valid(raise_exception=True)
+        short_keys = serializer.validated_data['short_keys']
+
+        results = []
+        for short_key, stats in zip(short_keys, ShortURLStatsService.batch_stats(short_keys)):
+            if stats is None:
+                results.append({'short_key': short_key, 'status': 'not_found'})
+            else:
+                results.append({'short_key': short_key, 'status': 'found', 'data': stats})
+        with span('serialize'):
+            data = BatchStatsResponseSerializer({'results': results}).data
+        return Response(data)
+
+
+class ShortURLResolveBatchView(BaseAuthView):
+    """
+    POST /short-urls/resolve/ - resolve up to BATCH_LOOKUP_MAX_KEYS short keys
+        the way redirects do, without recording clicks, so that an edge
+        proxy can warm its cache. Returns a result per key in request order.
+    """
+
+    @extend_schema(
+        request=BatchShortKeysSerializer,
+        responses={200: BatchResolveResponseSerializer},
+        operation_id="shorturl_resolve_batch"
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = BatchShortKeysSerializer(data=request.data)
+        with span('validate'):
+            serializer.is_valid(raise_exception=True)
+        short_keys = serializer.validated_data['short_keys']
+
+        resolved_keys = RedirectShortURLService.resolve_many(short_keys)
+        now = timezone.now()
+        results = []
+        for short_key in short_keys:
+            resolved = resolved_keys[short_key]
+            if not resolved.exists:
+                state = 'not_found'
+            elif resolved.is_live(now):
+                state = 'live'
+            else:
+                state = 'gone'
+            results.append({
+                'short_key': short_key,
+                'status': state,
+                'original_url': resolved.original_url if state == 'live' else None,
+                'redirect_status': resolved.redirect_status if state == 'live' else None,
+                'expires_at': resolved.expires_at,
+                'max_age': RedirectShortURLService.max_age(resolved) if state == 'live' else 0,
+            })
+        with span('serialize'):
+            data = BatchResolveResponseSerializer({'results': results}).data
+        return Response(data)
+
+
+class MetricsView(View):
+    """
+    GET /metrics - request, query and span counters plus click recorder,
+        redirect cache, key pool and key filter state in the Prometheus
+        text format. Enabled by SHORT_URLS_METRICS_ENABLED and guarded by
+        SHORT_URLS_METRICS_TOKEN when that is set.
+    """
+
+    @staticmethod
+    def gauges() -> dict:
+        values = {
+            'click_recorder': click_recorder.stats(),
+            'redirect_cache': redirect_cache.stats(),
+        }
+        # Pool stats count the pool table: only worth a query when it is used
+        if settings.SHORT_KEY_STRATEGY == 'pool':
+            values['key_pool'] = KEY_STRATEGIES['pool'].stats()
+        if settings.SHORT_URLS_KEY_FILTER:
+            values['key_filter'] = short_key_filter.stats()
+        db_pool = db_pool_stats()
+        if db_pool is not None:
+            values['db_pool'] = db_pool
+        return values
+
+    @staticmethod
+    def authorized(request) -> bool:
+        token = settings.SHORT_URLS_METRICS_TOKEN
+        if not token:
+            return True
+        return secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+    def get(self, request):
+        if not settings.SHORT_URLS_METRICS_ENABLED:
+            return HttpResponseNotFound()
+        if not self.authorized(request):
+            response = HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        return HttpResponse(
+            metrics.render(self.gauges()),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
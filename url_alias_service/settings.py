@@ -33,6 +33,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Query counts, DB time and service spans per request (Server-Timing, /metrics)
+    'short_urls.middleware.InstrumentationMiddleware',
+    # Keeps a client on the primary database for a while after it wrote
+    'short_urls.middleware.ReplicaStickinessMiddleware',
+    # Answers /<short_key>/ redirects before the rest of the stack
+    'short_urls.middleware.RedirectFastPathMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -72,14 +78,123 @@ DATABASES = {
         'PASSWORD': env('POSTGRES_PASSWORD', default='postgres'),
         'HOST': env('DB_HOST', default='localhost'),
         'PORT': env('DB_PORT', default='5432'),
+        # Reuse connections across requests instead of reconnecting each time
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+        'OPTIONS': {},
     }
 }
 
+# psycopg 3 connection pool (one per process). Django requires CONN_MAX_AGE=0
+# with a pool: connections go back to the pool at the end of each request.
+if env.bool('DB_POOL', default=False):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+        'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+        'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+    }
+
+# Behind pgbouncer in transaction pooling mode: no server-side cursors and no
+# prepared statements, which do not survive a switch of server connection
+if env.bool('DB_PGBOUNCER', default=False):
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    DATABASES['default']['OPTIONS']['prepare_threshold'] = None
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds aliases replica1, replica2
+# with the primary's credentials. Reads go to a replica, writes to 'default';
+# a client reads from the primary for a while after it wrote.
+SHORT_URLS_DB_REPLICAS = []
+for _index, _host in enumerate(env.list('DB_REPLICA_HOSTS', default=[]), start=1):
+    DATABASES[f'replica{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    SHORT_URLS_DB_REPLICAS.append(f'replica{_index}')
+SHORT_URLS_REPLICA_STICKY_SECONDS = env.int('DB_REPLICA_STICKY_SECONDS', default=10)
+DATABASE_ROUTERS = ['short_urls.routers.PrimaryReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The 'short_urls' alias is shared by all workers when REDIS_URL is set and
+# falls back to a per-process local-memory cache otherwise.
+
+REDIS_URL = env('REDIS_URL', default=None)
+
+if REDIS_URL:
+    SHARED_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'short-urls',
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'short_urls': {
+        **SHARED_CACHE_BACKEND,
+        'KEY_PREFIX': 'short_urls',
+        'VERSION': env.int('SHORT_URLS_CACHE_VERSION', default=1),
+    },
+}
+
+# Short URLs
+# Click recording: 'async' buffers clicks and writes them in batches from a
+# background thread, 'sync' writes every click inside the redirect request.
+# Overflow policy of the async buffer: drop_newest, drop_oldest or block.
+
+SHORT_URLS_CLICK_RECORDER_MODE = env('CLICK_RECORDER_MODE', default='async')
+SHORT_URLS_CLICK_OVERFLOW_POLICY = env('CLICK_OVERFLOW_POLICY', default='drop_newest')
+
+# Raw clicks (and hourly buckets) older than this are removed by
+# `manage.py manage_click_partitions`; all-time counters are kept.
+SHORT_URLS_CLICK_RETENTION_DAYS = env.int('CLICK_RETENTION_DAYS', default=90)
+
+# Per-request Server-Timing header and the Prometheus /metrics endpoint.
+# Both expose internals on the public host, so they are off by default;
+# with METRICS_TOKEN set /metrics also requires "Authorization: Bearer <token>".
+SHORT_URLS_SERVER_TIMING = env.bool('SERVER_TIMING', default=False)
+SHORT_URLS_METRICS_ENABLED = env.bool('METRICS_ENABLED', default=False)
+SHORT_URLS_METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# Cache-Control max-age of redirects (capped at the link's expiry). Redirects
+# served from a browser or CDN cache never reach us and are not counted as
+# clicks; 0 makes clients revalidate every time.
+SHORT_URLS_REDIRECT_MAX_AGE = env.int('REDIRECT_MAX_AGE', default=0)
+
+# Serve redirects with the native async view (enable when running under ASGI)
+SHORT_URLS_ASYNC_REDIRECT = env.bool('ASYNC_REDIRECT', default=False)
+
+# Answer redirects for never-issued keys from an in-memory Bloom filter of
+# all short keys (needs the shared cache when several processes serve)
+SHORT_URLS_KEY_FILTER = env.bool('KEY_FILTER', default=False)
+
+# Default of the create request's reuse_existing flag: return an existing
+# live link to the same URL instead of creating a duplicate
+SHORT_URLS_CREATE_REUSE_EXISTING = env.bool('CREATE_REUSE_EXISTING', default=False)
+
+# Short key generation: 'checked' (random key + lookup), 'random' (random key,
+# collisions resolved by the unique constraint), 'sequence' (block-allocated
+# counter through a keyed permutation; changing the key reshuffles new keys)
+# or 'pool' (keys pre-generated by `manage.py refill_key_pool` with the
+# SHORT_KEY_POOL_SOURCE strategy).
+SHORT_KEY_STRATEGY = env('SHORT_KEY_STRATEGY', default='random')
+SHORT_KEY_PERMUTATION_KEY = env('SHORT_KEY_PERMUTATION_KEY', default=SECRET_KEY)
+SHORT_KEY_POOL_SOURCE = env('SHORT_KEY_POOL_SOURCE', default='random')
+
 # Rest framework
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'short_urls.authentication.APIKeyAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -1,12 +1,17 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include, re_path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from short_urls.views import RedirectView
+from short_urls.views import AsyncRedirectView, MetricsView, RedirectView
+
+# Under ASGI the native async view avoids a thread hop per redirect
+redirect_view = AsyncRedirectView if settings.SHORT_URLS_ASYNC_REDIRECT else RedirectView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('short_urls.urls')),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    re_path(r'^(?P<short_key>[a-zA-Z0-9]+)/$', RedirectView.as_view(), name='redirect'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    re_path(r'^(?P<short_key>[a-zA-Z0-9]+)/$', redirect_view.as_view(), name='redirect'),
 ]
\ No newline at end of file